@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from typing import Any, Dict
+from app.core.warmup import warmup
+
+router = APIRouter()
+
+@router.get("/live")
+async def liveness() -> Dict[str, Any]:
+    """The process is up and serving requests"""
+    return {"status": "ok"}
+
+@router.get("/ready")
+async def readiness() -> JSONResponse:
+    """
+    Ready once the startup warm-up has finished (503 before)
+    The body gives the outcome and duration of each warm-up stage
+    """
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
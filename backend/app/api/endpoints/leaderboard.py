@@ -1,7 +1,10 @@
-from fastapi import APIRouter
-from typing import List, Dict, Any
+from fastapi import APIRouter, Depends, Query, Request, Response
+from typing import Any, Dict, List, Optional, Tuple
+from dataclasses import replace
 from app.services.leaderboard import LeaderboardService
-from app.core.fastapi_cache import cached, build_cache_key
+from app.services.leaderboard_query import MAX_PAGE_SIZE, LeaderboardQuery, QueryResult, parse_sort
+from app.services.snapshot import LeaderboardSnapshot
+from app.core.payload import WIRE_FORMATS, negotiate_format, payload_response
 import logging
 from app.utils.logging import LogFormatter
 
@@ -9,41 +12,301 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 leaderboard_service = LeaderboardService()
 
-def leaderboard_key_builder(func, namespace: str = "leaderboard", **kwargs):
-    """Build cache key for leaderboard data"""
-    key_type = "raw" if func.__name__ == "get_leaderboard" else "formatted"
-    key = build_cache_key(namespace, key_type)
-    logger.debug(LogFormatter.info(f"Built leaderboard cache key: {key}"))
-    return key
+def _split(values: Optional[List[str]]) -> tuple:
+    """Accept both repeated and comma-separated query parameters"""
+    return tuple(
+        item.strip()
+        for value in values or []
+        for item in value.split(",")
+        if item.strip()
+    )
+
+def leaderboard_query(
+    precision: Optional[List[str]] = Query(None, description="Only these precisions, e.g. float16"),
+    model_type: Optional[List[str]] = Query(None, alias="type", description="Only these model types"),
+    params_min: Optional[float] = Query(None, ge=0, description="Minimum #Params (B), inclusive"),
+    params_max: Optional[float] = Query(None, ge=0, description="Maximum #Params (B), exclusive"),
+    feature: Optional[List[str]] = Query(None, description="Required features, e.g. is_moe"),
+    exclude_feature: Optional[List[str]] = Query(None, description="Excluded features, e.g. is_flagged"),
+    sort: Optional[str] = Query(None, description="Comma-separated dotted paths, '-' prefix for descending"),
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="Cursor from a previous X-Next-Cursor header"),
+) -> Optional[LeaderboardQuery]:
+    """Build a leaderboard query from request parameters, None if none were given"""
+    query = LeaderboardQuery(
+        precisions=_split(precision),
+        types=_split(model_type),
+        params_min=params_min,
+        params_max=params_max,
+        features=_split(feature),
+        exclude_features=_split(exclude_feature),
+        sort=parse_sort(sort),
+        offset=offset,
+        limit=limit,
+        cursor=cursor,
+    )
+    return None if query == LeaderboardQuery() and sort is None else query
+
+def response_format(
+    request: Request,
+    wire_format: Optional[str] = Query(
+        None,
+        alias="format",
+        pattern=f"^({'|'.join(WIRE_FORMATS)})$",
+        description="json (rows), columns (column-oriented JSON), arrow (Arrow IPC stream) or parquet; "
+                    "defaults to the Accept header"
+    )
+) -> str:
+    """Wire format requested with `format=` or the Accept header"""
+    return negotiate_format(wire_format, request.headers.get("accept"))
+
+def response_fields(
+    fields: Optional[List[str]] = Query(
+        None,
+        description="Only these dotted paths, e.g. model.name,model.average_score,evaluations.qa"
+    )
+) -> Tuple[str, ...]:
+    """Requested field paths, normalized so equivalent requests share a cache entry"""
+    return tuple(sorted(set(_split(fields))))
+
+async def leaderboard_snapshot(
+    as_of: Optional[str] = Query(
+        None,
+        description="Past leaderboard version (dataset commit sha or prefix) or ISO date/time"
+    )
+) -> LeaderboardSnapshot:
+    """Current snapshot, or the stored one selected by `as_of`"""
+    if as_of is None:
+        return await leaderboard_service.get_snapshot()
+    return await leaderboard_service.get_snapshot_as_of(as_of)
+
+def snapshot_headers(snapshot: LeaderboardSnapshot) -> Dict[str, str]:
+    """Headers identifying the snapshot a response was built from"""
+    return {
+        "X-Leaderboard-Version": snapshot.version,
+        "X-Leaderboard-Age": f"{snapshot.age:.0f}"
+    }
+
+async def query_response(request: Request, snapshot: LeaderboardSnapshot, result: QueryResult) -> Response:
+    """Send a query result with its pagination headers"""
+    headers = {**snapshot_headers(snapshot), "X-Total-Count": str(result.total), "Vary": "Accept"}
+    if result.next_cursor:
+        headers["X-Next-Cursor"] = result.next_cursor
+    return await payload_response(request, result.payload, headers)
 
 @router.get("")
-@cached(expire=300, key_builder=leaderboard_key_builder)
-async def get_leaderboard() -> List[Dict[str, Any]]:
+async def get_leaderboard(
+    request: Request,
+    wire_format: str = Depends(response_format),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
     """
     Get raw leaderboard data
-    Response will be automatically GZIP compressed if size > 500 bytes
+    The body is serialized once per snapshot and format and sent with an ETag;
+    requests with a matching If-None-Match get a 304
     """
     try:
-        logger.info(LogFormatter.info("Fetching raw leaderboard data"))
-        data = await leaderboard_service.fetch_raw_data()
-        logger.info(LogFormatter.success(f"Retrieved {len(data)} leaderboard entries"))
-        return data
+        logger.info(LogFormatter.info(f"Fetching raw leaderboard data as {wire_format}"))
+        payload = await leaderboard_service.get_payload(snapshot, "raw", wire_format)
+        logger.info(LogFormatter.success(f"Retrieved raw leaderboard ({len(payload):,} bytes)"))
+        return await payload_response(request, payload, {**snapshot_headers(snapshot), "Vary": "Accept"})
     except Exception as e:
         logger.error(LogFormatter.error("Failed to fetch raw leaderboard data", e))
         raise
 
 @router.get("/formatted")
-@cached(expire=300, key_builder=leaderboard_key_builder)
-async def get_formatted_leaderboard() -> List[Dict[str, Any]]:
+async def get_formatted_leaderboard(
+    request: Request,
+    query: Optional[LeaderboardQuery] = Depends(leaderboard_query),
+    wire_format: str = Depends(response_format),
+    fields: Tuple[str, ...] = Depends(response_fields),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
     """
     Get formatted leaderboard data with restructured objects
-    Response will be automatically GZIP compressed if size > 500 bytes
+    Without query parameters the whole board is returned. Filters, sort keys and
+    offset/cursor pagination select a page instead; the total number of matches is
+    sent in X-Total-Count and the cursor of the next page in X-Next-Cursor.
+    Columnar formats use flat columns named by dotted path. `fields` keeps only the
+    given paths, a path selecting its whole subtree
     """
     try:
-        logger.info(LogFormatter.info("Fetching formatted leaderboard data"))
-        data = await leaderboard_service.get_formatted_data()
-        logger.info(LogFormatter.success(f"Retrieved {len(data)} formatted entries"))
-        return data
+        if query is None:
+            logger.info(LogFormatter.info(f"Fetching formatted leaderboard data as {wire_format}"))
+            payload = await leaderboard_service.get_payload(snapshot, "formatted", wire_format, fields)
+            logger.info(LogFormatter.success(f"Retrieved formatted leaderboard ({len(payload):,} bytes)"))
+            return await payload_response(request, payload, {**snapshot_headers(snapshot), "Vary": "Accept"})
+
+        logger.info(LogFormatter.info(f"Querying formatted leaderboard: {query}"))
+        result = await leaderboard_service.query(snapshot, query, wire_format, fields)
+        logger.info(LogFormatter.success(f"Retrieved {result.total:,} matching entries"))
+        return await query_response(request, snapshot, result)
     except Exception as e:
         logger.error(LogFormatter.error("Failed to fetch formatted leaderboard data", e))
-        raise 
\ No newline at end of file
+        raise
+
+@router.get("/search")
+async def search_leaderboard(
+    request: Request,
+    q: str = Query(..., description="Search query, e.g. 'llama @precision:bfloat16;qwen'"),
+    query: Optional[LeaderboardQuery] = Depends(leaderboard_query),
+    wire_format: str = Depends(response_format),
+    fields: Tuple[str, ...] = Depends(response_fields),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
+    """
+    Search the formatted leaderboard with the frontend search syntax
+    Groups separated by ';' are alternatives. Each group may contain @precision:,
+    @architecture:, @license: and @type: filters plus free text or a regex matched
+    against the model name. Filter, sort, pagination, format and fields parameters of /formatted apply
+    """
+    try:
+        logger.info(LogFormatter.info(f"Searching leaderboard: {q}"))
+        result = await leaderboard_service.query(snapshot, replace(query or LeaderboardQuery(), search=q), wire_format, fields)
+        logger.info(LogFormatter.success(f"Found {result.total:,} matching entries"))
+        return await query_response(request, snapshot, result)
+    except Exception as e:
+        logger.error(LogFormatter.error("Failed to search leaderboard", e))
+        raise
+
+@router.get("/rankings/{task}")
+async def get_task_rankings(
+    request: Request,
+    task: str,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE, description="Number of top models"),
+    fields: Tuple[str, ...] = Depends(response_fields),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
+    """
+    Get the best models for a task (multifin, qa, fns, finnum, fintext) or for the average score
+    Models are in rank order and carry their dense rank and percentile for every task under
+    `rankings`; ranks are computed once per snapshot
+    """
+    try:
+        logger.info(LogFormatter.info(f"Fetching top {limit} models for {task}"))
+        payload = await leaderboard_service.rankings(snapshot, task, limit, fields)
+        logger.info(LogFormatter.success(f"Retrieved {task} rankings ({len(payload):,} bytes)"))
+        return await payload_response(request, payload, snapshot_headers(snapshot))
+    except Exception as e:
+        logger.error(LogFormatter.error(f"Failed to fetch {task} rankings", e))
+        raise
+
+@router.get("/facets")
+async def get_leaderboard_facets(
+    request: Request,
+    q: Optional[str] = Query(None, description="Search query with the /search syntax"),
+    query: Optional[LeaderboardQuery] = Depends(leaderboard_query),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
+    """
+    Get the number of models per type, precision, architecture, license, params bucket and feature
+    Filter parameters of /formatted (and `q`) restrict the counts to the matching models;
+    counts are intersections of bitmap indexes built once per snapshot
+    """
+    try:
+        if q:
+            query = replace(query or LeaderboardQuery(), search=q)
+        logger.info(LogFormatter.info(f"Counting leaderboard facets: {query}"))
+        payload = await leaderboard_service.facets(snapshot, query)
+        logger.info(LogFormatter.success(f"Retrieved leaderboard facets ({len(payload):,} bytes)"))
+        return await payload_response(request, payload, snapshot_headers(snapshot))
+    except Exception as e:
+        logger.error(LogFormatter.error("Failed to count leaderboard facets", e))
+        raise
+
+@router.get("/compare")
+async def compare_models(
+    request: Request,
+    ids: List[str] = Query(..., description="Model ids (the `id` of formatted rows), the first one is the reference"),
+    fields: Tuple[str, ...] = Depends(response_fields),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
+    """
+    Compare up to 20 models
+    Each model gets its scores, its deltas and rank gaps to the first model for the
+    average and every task, and its formatted row (restricted by `fields`)
+    """
+    try:
+        # Keep the requested order, it decides the reference model
+        model_ids = tuple(dict.fromkeys(_split(ids)))
+        logger.info(LogFormatter.info(f"Comparing {len(model_ids)} models"))
+        payload = await leaderboard_service.compare(snapshot, model_ids, fields)
+        logger.info(LogFormatter.success(f"Retrieved model comparison ({len(payload):,} bytes)"))
+        return await payload_response(request, payload, snapshot_headers(snapshot))
+    except Exception as e:
+        logger.error(LogFormatter.error("Failed to compare models", e))
+        raise
+
+@router.get("/pareto")
+async def get_pareto_frontier(
+    request: Request,
+    task: str = Query("average", description="Score to maximize: average or a task key"),
+    co2: bool = Query(False, description="Also minimize the CO₂ cost"),
+    q: Optional[str] = Query(None, description="Search query with the /search syntax"),
+    query: Optional[LeaderboardQuery] = Depends(leaderboard_query),
+    fields: Tuple[str, ...] = Depends(response_fields),
+    snapshot: LeaderboardSnapshot = Depends(leaderboard_snapshot)
+) -> Response:
+    """
+    Get the models no other model beats on both size and score
+    A model is left out if another one has at most as many parameters (and, with co2,
+    at most the same CO₂ cost) and at least the same score. Filter parameters of /formatted
+    (and `q`) restrict the candidates. Models are sorted by size
+    """
+    try:
+        if q:
+            query = replace(query or LeaderboardQuery(), search=q)
+        logger.info(LogFormatter.info(f"Computing {task} Pareto frontier: {query}"))
+        payload = await leaderboard_service.pareto(snapshot, task, co2, query, fields)
+        logger.info(LogFormatter.success(f"Retrieved {task} Pareto frontier ({len(payload):,} bytes)"))
+        return await payload_response(request, payload, snapshot_headers(snapshot))
+    except Exception as e:
+        logger.error(LogFormatter.error(f"Failed to compute the {task} Pareto frontier", e))
+        raise
+
+@router.get("/changes")
+async def get_leaderboard_changes(
+    request: Request,
+    since: str = Query(..., description="Version the client currently has, from X-Leaderboard-Version")
+) -> Response:
+    """
+    Get the formatted rows added, modified or removed since an earlier snapshot version
+    Removed rows are listed by id. If the version is unknown or too old to diff against,
+    full_resync is true and every current row is returned as added
+    """
+    try:
+        logger.info(LogFormatter.info(f"Fetching leaderboard changes since {since}"))
+        snapshot = await leaderboard_service.get_snapshot()
+        payload = await leaderboard_service.changes(snapshot, since)
+        logger.info(LogFormatter.success(f"Retrieved leaderboard changes ({len(payload):,} bytes)"))
+        return await payload_response(request, payload, snapshot_headers(snapshot))
+    except Exception as e:
+        logger.error(LogFormatter.error("Failed to fetch leaderboard changes", e))
+        raise
+
+@router.get("/version")
+async def get_leaderboard_version() -> Dict[str, Any]:
+    """Version and age of the leaderboard snapshot currently served"""
+    return leaderboard_service.snapshot_info()
+
+@router.get("/history")
+async def get_leaderboard_history() -> List[Dict[str, Any]]:
+    """Stored leaderboard versions, oldest first; any of them can be passed as as_of"""
+    return leaderboard_service.history_versions()
+
+@router.get("/history/{model_id:path}")
+async def get_model_history(model_id: str) -> Dict[str, Any]:
+    """
+    Get the scores of a model in every stored leaderboard version
+    Entries are listed oldest first with the model revision (Model sha) they were
+    evaluated on; `revisions` gives the versions each revision appears in
+    """
+    try:
+        logger.info(LogFormatter.info(f"Fetching score history of {model_id}"))
+        history = await leaderboard_service.model_history(model_id)
+        logger.info(LogFormatter.success(f"Found {len(history['history'])} history entries"))
+        return history
+    except Exception as e:
+        logger.error(LogFormatter.error(f"Failed to fetch the history of {model_id}", e))
+        raise
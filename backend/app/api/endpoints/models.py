@@ -1,43 +1,53 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any, List
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Dict, Any, List, Literal, Optional
 import logging
 from app.services.models import ModelService
 from app.api.dependencies import get_model_service
-from app.core.fastapi_cache import cached
+from app.core.payload import payload_response
 from app.utils.logging import LogFormatter
 
 logger = logging.getLogger(__name__)
 router = APIRouter(tags=["models"])
 
 @router.get("/status")
-@cached(expire=300)
 async def get_models_status(
+    request: Request,
     model_service: ModelService = Depends(get_model_service)
-) -> Dict[str, List[Dict[str, Any]]]:
-    """Get all models grouped by status"""
+) -> Response:
+    """
+    Get all models grouped by status
+    The body is serialized and compressed once per cache refresh and sent with an ETag
+    """
     try:
         logger.info(LogFormatter.info("Fetching status for all models"))
-        result = await model_service.get_models()
-        stats = {
-            status: len(models) for status, models in result.items()
-        }
-        for line in LogFormatter.stats(stats, "Models by Status"):
-            logger.info(line)
-        return result
+        payload = await model_service.get_models_payload()
+        logger.info(LogFormatter.success(f"Retrieved models status ({len(payload):,} bytes)"))
+        return await payload_response(request, payload)
     except Exception as e:
         logger.error(LogFormatter.error("Failed to get models status", e))
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/pending")
-@cached(expire=60)
 async def get_pending_models(
+    votes: bool = Query(False, description="Include the vote counts of each model"),
+    user_id: Optional[str] = Query(None, description="HuggingFace username, adds whether they voted for each model"),
+    sort: Optional[Literal["votes"]] = Query(None, description="Most voted models first"),
+    limit: Optional[int] = Query(None, ge=1, description="Number of models returned"),
     model_service: ModelService = Depends(get_model_service)
 ) -> List[Dict[str, Any]]:
-    """Get all models waiting for evaluation"""
+    """Get all models waiting for evaluation
+
+    Vote counts come from the vote service's in-memory counters, so the whole
+    vote page is one request. Not cached, so a new vote shows up right away.
+    """
     try:
         logger.info(LogFormatter.info("Fetching pending models"))
-        models = await model_service.get_models()
-        pending = models.get("pending", [])
+        pending = await model_service.get_pending_models(
+            with_votes=votes,
+            user_id=user_id,
+            sort_by_votes=sort == "votes",
+            limit=limit
+        )
         logger.info(LogFormatter.success(f"Found {len(pending)} pending models"))
         return pending
     except Exception as e:
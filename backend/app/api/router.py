@@ -1,9 +1,10 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import leaderboard, votes, models
+from app.api.endpoints import leaderboard, votes, models, health
 
 router = APIRouter()
 
 router.include_router(leaderboard.router, prefix="/leaderboard", tags=["leaderboard"])
 router.include_router(votes.router, prefix="/votes", tags=["votes"])
-router.include_router(models.router, prefix="/models", tags=["models"]) 
\ No newline at end of file
+router.include_router(models.router, prefix="/models", tags=["models"])
+router.include_router(health.router, prefix="/health", tags=["health"]) 
\ No newline at end of file
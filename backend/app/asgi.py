@@ -7,11 +7,15 @@ import logging
 import logging.config
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 import sys
 
 from app.api.router import router
 from app.core.fastapi_cache import setup_cache
+from app.core.compression import OffloadedGZipMiddleware
+from app.core.warmup import warmup
+from app.services.leaderboard import LeaderboardService
+from app.services.models import ModelService
+from app.services.votes import VoteService
 from app.utils.logging import LogFormatter
 from app.config import hf_config
 
@@ -77,10 +81,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor", "X-Leaderboard-Version", "X-Leaderboard-Age"],
 )
 
-# Add GZIP compression
-app.add_middleware(GZipMiddleware, minimum_size=500)
+# Add GZIP compression for dynamic responses, precompressed payloads pass through
+app.add_middleware(OffloadedGZipMiddleware, minimum_size=500)
 
 # Include API router
 app.include_router(router, prefix="/api")
@@ -103,4 +108,26 @@ async def startup_event():
     
     # Setup cache
     setup_cache()
-    logger.info(LogFormatter.success("FastAPI Cache initialized with in-memory backend")) 
+    logger.info(LogFormatter.success("FastAPI Cache initialized with in-memory backend"))
+    
+    # Keep the leaderboard snapshot fresh off the request path
+    LeaderboardService().start_background_refresh()
+
+    # Pick up new votes from the hub off the request path
+    VoteService().start_background_sync()
+    VoteService().start_background_upload()
+
+    # Load votes, models and the leaderboard concurrently, /api/health/ready reports when done
+    warmup.start({
+        "votes": VoteService().initialize,
+        "models": ModelService().initialize,
+        "leaderboard": LeaderboardService().get_snapshot,
+    })
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks on shutdown"""
+    await warmup.stop()
+    await VoteService().stop_background_sync()
+    await VoteService().stop_background_upload()
+    await LeaderboardService().stop_background_refresh()
@@ -32,6 +32,7 @@ DATASETS_CACHE = CACHE_ROOT / "datasets"
 MODELS_CACHE = CACHE_ROOT / "models"
 VOTES_CACHE = CACHE_ROOT / "votes"
 EVAL_CACHE = CACHE_ROOT / "eval-queue"
+HISTORY_CACHE = CACHE_ROOT / "leaderboard-history"
 
 # Repository configuration
 QUEUE_REPO = f"{HF_ORGANIZATION}/requests"
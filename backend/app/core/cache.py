@@ -10,6 +10,7 @@ from app.config.base import (
     MODELS_CACHE,
     VOTES_CACHE,
     EVAL_CACHE,
+    HISTORY_CACHE,
     CACHE_TTL
 )
 
@@ -23,9 +24,11 @@ class CacheConfig:
         self.models_cache = MODELS_CACHE
         self.votes_cache = VOTES_CACHE
         self.eval_cache = EVAL_CACHE
+        self.history_cache = HISTORY_CACHE
         
         # Specific files
         self.votes_file = self.votes_cache / "votes_data.jsonl"
+        self.votes_outbox_file = self.votes_cache / "votes_outbox.jsonl"
         self.eval_requests_file = self.eval_cache / "eval_requests.jsonl"
         
         # Cache TTL
@@ -44,7 +47,8 @@ class CacheConfig:
                 "Datasets": self.datasets_cache,
                 "Models": self.models_cache,
                 "Votes": self.votes_cache,
-                "Eval": self.eval_cache
+                "Eval": self.eval_cache,
+                "History": self.history_cache
             }
             
             for name, cache_dir in cache_dirs.items():
@@ -75,7 +79,8 @@ class CacheConfig:
             "datasets": self.datasets_cache,
             "models": self.models_cache,
             "votes": self.votes_cache,
-            "eval": self.eval_cache
+            "eval": self.eval_cache,
+            "history": self.history_cache
         }
         return cache_paths.get(cache_type, self.cache_root)
 
@@ -0,0 +1,124 @@
+"""
+Response compression: encoders, Accept-Encoding negotiation and a gzip
+middleware that compresses large bodies off the event loop.
+"""
+import gzip
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.types import Message, Receive, Scope, Send
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Bodies smaller than this are not worth compressing
+MINIMUM_SIZE = 500
+# Bodies at least this large are compressed in a worker thread
+OFFLOAD_SIZE = 64 * 1024
+# Media types whose bodies are already compressed
+COMPRESSED_MEDIA_TYPES = {"application/vnd.apache.parquet", "application/zip", "application/gzip"}
+
+def _gzip(data: bytes) -> bytes:
+    # Fixed mtime so the same body always compresses to the same bytes
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+# Supported encodings, most preferred first
+ENCODERS: Dict[str, Callable[[bytes], bytes]] = {}
+
+try:
+    import brotli
+    ENCODERS["br"] = lambda data: brotli.compress(data, quality=9)
+except ImportError:
+    logger.debug(LogFormatter.info("brotli is not installed, br encoding disabled"))
+
+try:
+    import zstandard
+    ENCODERS["zstd"] = zstandard.ZstdCompressor(level=10).compress
+except ImportError:
+    logger.debug(LogFormatter.info("zstandard is not installed, zstd encoding disabled"))
+
+ENCODERS["gzip"] = _gzip
+
+def parse_qvalues(header: str) -> Dict[str, float]:
+    """Map each item of an Accept-style header to its q-value"""
+    weights = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[coding] = quality
+    return weights
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Iterable[str] = None) -> Optional[str]:
+    """Pick the encoding to send, None for the uncompressed body
+
+    The client's highest q-value wins, ties go to the server preference
+    order of ENCODERS.
+    """
+    if not accept_encoding:
+        return None
+    weights = parse_qvalues(accept_encoding)
+    best, best_quality = None, 0.0
+    for encoding in available if available is not None else ENCODERS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+class OffloadedGZipResponder(GZipResponder):
+    """GZip responder that compresses large complete bodies in a worker thread"""
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            await super().send_with_gzip(message)
+            media_type = Headers(raw=message["headers"]).get("content-type", "").split(";")[0].strip()
+            if media_type in COMPRESSED_MEDIA_TYPES:
+                # Pass through like responses that already set Content-Encoding
+                self.content_encoding_set = True
+            return
+
+        body = message.get("body", b"")
+        if (
+            message["type"] == "http.response.body"
+            and not self.started
+            and not self.content_encoding_set
+            and not message.get("more_body", False)
+            and len(body) >= OFFLOAD_SIZE
+        ):
+            self.started = True
+            compressed = await asyncio.to_thread(_gzip, body)
+
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = "gzip"
+            headers["Content-Length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+
+            await self.send(self.initial_message)
+            await self.send({**message, "body": compressed})
+            return
+        await super().send_with_gzip(message)
+
+class OffloadedGZipMiddleware(GZipMiddleware):
+    """Starlette's GZipMiddleware, without blocking the event loop on large bodies
+
+    Responses that already set Content-Encoding (precompressed payloads) are
+    passed through untouched.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and negotiate_encoding(Headers(scope=scope).get("Accept-Encoding"), ["gzip"]):
+            responder = OffloadedGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+            await responder(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,168 @@
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Optional, Union
+import pyarrow as pa
+import pyarrow.parquet as pq
+from fastapi import Request, Response
+from app.core.compression import ENCODERS, MINIMUM_SIZE, negotiate_encoding, parse_qvalues
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Wire format -> media type. `json` is the row-oriented default
+WIRE_FORMATS = {
+    "json": "application/json",
+    "columns": "application/vnd.leaderboard.columns+json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+def _json_default(value: Any) -> Any:
+    """Encode values the standard JSON encoder does not handle"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8", errors="replace")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class SerializedPayload:
+    """Response body serialized once, identified by a hash of its content
+
+    Compressed variants are built once per encoding and kept with the body.
+    The body and variants may be memoryviews, e.g. of files mapped from the
+    history store.
+    """
+
+    def __init__(self, body: Union[bytes, memoryview], media_type: str = "application/json", compress: bool = True):
+        self.body = body
+        self.media_type = media_type
+        self.compress = compress
+        self.etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        self.variants: Dict[str, Union[bytes, memoryview]] = {}
+
+    def __len__(self) -> int:
+        return len(self.body)
+
+    @property
+    def compressible(self) -> bool:
+        return self.compress and len(self.body) >= MINIMUM_SIZE
+
+    def encoded(self, encoding: str) -> Union[bytes, memoryview]:
+        """Body compressed with one of the supported encodings (blocking)"""
+        if encoding not in self.variants:
+            self.variants[encoding] = ENCODERS[encoding](self.body)
+        return self.variants[encoding]
+
+    def precompress(self) -> "SerializedPayload":
+        """Build every supported compressed variant up front (blocking)"""
+        if self.compressible and any(encoding not in self.variants for encoding in ENCODERS):
+            sizes = {encoding: len(self.encoded(encoding)) for encoding in ENCODERS}
+            logger.info(LogFormatter.info(
+                f"Precompressed {len(self.body) / 1024:.1f}KB payload: "
+                + ", ".join(f"{encoding} {size / 1024:.1f}KB" for encoding, size in sizes.items())
+            ))
+        return self
+
+    def variant_etag(self, encoding: Optional[str]) -> str:
+        """ETag of the body as sent with a given content coding"""
+        return self.etag if encoding is None else f'{self.etag[:-1]}-{encoding}"'
+
+def dump_json(data: Any) -> bytes:
+    """Encode data as compact JSON bytes"""
+    return json.dumps(
+        data,
+        default=_json_default,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+def serialize_json(data: Any) -> SerializedPayload:
+    """Serialize data to a compact JSON payload"""
+    return SerializedPayload(dump_json(data))
+
+def serialize_table(table: pa.Table, wire_format: str) -> SerializedPayload:
+    """Serialize an Arrow table in a columnar wire format
+
+    `columns` is JSON mapping each column name to its values, `arrow` an Arrow
+    IPC stream and `parquet` a zstd-compressed Parquet file.
+    """
+    if wire_format == "columns":
+        data = {
+            "num_rows": table.num_rows,
+            "columns": {name: table.column(name).to_pylist() for name in table.column_names}
+        }
+        return SerializedPayload(dump_json(data), WIRE_FORMATS["columns"])
+
+    sink = pa.BufferOutputStream()
+    if wire_format == "arrow":
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return SerializedPayload(sink.getvalue().to_pybytes(), WIRE_FORMATS["arrow"])
+    if wire_format == "parquet":
+        pq.write_table(table, sink, compression="zstd")
+        # Already compressed, no HTTP content coding on top
+        return SerializedPayload(sink.getvalue().to_pybytes(), WIRE_FORMATS["parquet"], compress=False)
+    raise ValueError(f"Unknown wire format: {wire_format}")
+
+def negotiate_format(wire_format: Optional[str], accept: Optional[str]) -> str:
+    """Wire format from an explicit `format=` value, else from the Accept header"""
+    if wire_format:
+        if wire_format not in WIRE_FORMATS:
+            raise ValueError(f"Unknown format: {wire_format}")
+        return wire_format
+    weights = parse_qvalues(accept or "")
+    best, best_quality = "json", 0.0
+    for name, media_type in WIRE_FORMATS.items():
+        quality = weights.get(media_type, 0.0)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+def etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    """Check an If-None-Match header against ETags (weak comparison)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return any(tag in etags for tag in candidates)
+
+async def payload_response(
+    request: Request,
+    payload: SerializedPayload,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Send a pre-serialized payload, answering conditional requests with 304
+
+    The body is sent in the best encoding the client accepts. Variants that
+    were not precompressed are compressed in a worker thread and kept.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding")) if payload.compressible else None
+    etag = payload.variant_etag(encoding)
+    response_headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        **(headers or {})
+    }
+    if payload.compressible:
+        vary = response_headers.get("Vary")
+        response_headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+    # Any variant of the same body is still valid
+    if etag_matches(request.headers.get("if-none-match"), etag, payload.etag):
+        logger.debug(LogFormatter.info(f"ETag {etag} matched, sending 304"))
+        return Response(status_code=304, headers=response_headers)
+    if encoding is None:
+        return Response(content=payload.body, media_type=payload.media_type, headers=response_headers)
+
+    body = payload.variants.get(encoding)
+    if body is None:
+        body = await asyncio.to_thread(payload.encoded, encoding)
+    response_headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=payload.media_type, headers=response_headers)
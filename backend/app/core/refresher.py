@@ -0,0 +1,101 @@
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+class BackgroundRefresher:
+    """Keep a value fresh off the request path (stale-while-revalidate)
+
+    The first `get` waits for a value. Afterwards `get` always returns the
+    current value immediately and, once it is older than `max_age`, starts a
+    refresh in the background. The new value replaces the old one only when
+    the refresh succeeds; a failed refresh keeps serving the previous value.
+    """
+
+    def __init__(self, name: str, refresh: Callable[[], Awaitable[Any]], max_age: float):
+        self.name = name
+        self._refresh = refresh
+        self.max_age = max_age
+        self.value: Any = None
+        self.updated_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> Optional[float]:
+        """Seconds since the value was last replaced"""
+        return None if self.updated_at is None else time.time() - self.updated_at
+
+    @property
+    def refreshing(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def get(self) -> Any:
+        """Current value, waiting only if there is none yet"""
+        if self.updated_at is None:
+            return await self.refresh()
+        if self.age > self.max_age:
+            logger.info(LogFormatter.info(
+                f"{self.name} is stale ({self.age:.1f}s old, TTL: {self.max_age}s), refreshing in background"
+            ))
+            self.trigger()
+        return self.value
+
+    def trigger(self) -> asyncio.Task:
+        """Start a refresh unless one is already running"""
+        if not self.refreshing:
+            self._task = asyncio.create_task(self._run())
+            # Failures are logged in _run, mark them as retrieved
+            self._task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return self._task
+
+    async def refresh(self) -> Any:
+        """Refresh now, joining the refresh in flight if there is one"""
+        return await asyncio.shield(self.trigger())
+
+    async def _run(self) -> Any:
+        start = time.time()
+        try:
+            value = await self._refresh()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(LogFormatter.error(f"Failed to refresh {self.name}", e))
+            raise
+        replaced = value is not self.value
+        self.value = value
+        self.updated_at = time.time()
+        self.last_error = None
+        message = LogFormatter.success(f"Refreshed {self.name} in {self.updated_at - start:.1f}s")
+        # Refreshes that kept the same value are routine, e.g. polls finding nothing new
+        logger.log(logging.INFO if replaced else logging.DEBUG, message)
+        return value
+
+    def start(self, interval: Optional[float] = None):
+        """Refresh periodically in the background"""
+        if self._loop_task is None or self._loop_task.done():
+            self._loop_task = asyncio.create_task(self._refresh_periodically(interval or self.max_age))
+
+    async def _refresh_periodically(self, interval: float):
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Already logged, keep serving the previous value
+                pass
+            await asyncio.sleep(interval)
+
+    async def stop(self):
+        """Cancel the periodic and in-flight refreshes"""
+        for task in (self._loop_task, self._task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+        self._loop_task = None
+        self._task = None
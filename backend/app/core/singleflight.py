@@ -0,0 +1,38 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key
+
+    The first caller for a key starts the computation; callers arriving while
+    it is in flight wait for the same result or exception instead of starting
+    their own. The computation runs as its own task, so a cancelled caller
+    does not cancel it for the others.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            logger.debug(LogFormatter.info(f"Joining in-flight call for {key}"))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark failures as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,80 @@
+"""
+Concurrent warm-up of the services at startup, and the readiness it reports.
+"""
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+class WarmUp:
+    """Run warm-up stages concurrently in the background, timing each of them
+
+    The application is ready once every stage has finished. A failed stage
+    does not block readiness: the service it warms keeps initializing on
+    first use, as it would without a warm-up.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.finished_at is not None
+
+    def start(self, stages: Dict[str, Callable[[], Awaitable[Any]]]):
+        """Start warming up without delaying startup"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(stages))
+
+    async def run(self, stages: Dict[str, Callable[[], Awaitable[Any]]]):
+        self.started_at = time.time()
+        self.finished_at = None
+        self.stages = {name: {"status": "running", "duration": None, "error": None} for name in stages}
+        logger.info(LogFormatter.section("WARM-UP"))
+        await asyncio.gather(*(self._run_stage(name, warm) for name, warm in stages.items()))
+        self.finished_at = time.time()
+
+        stats = {name: f"{stage['status']} in {stage['duration']:.1f}s" for name, stage in self.stages.items()}
+        stats["Total"] = f"{self.finished_at - self.started_at:.1f}s"
+        for line in LogFormatter.stats(stats, "Warm-up Timings"):
+            logger.info(line)
+
+    async def _run_stage(self, name: str, warm: Callable[[], Awaitable[Any]]):
+        stage = self.stages[name]
+        start = time.time()
+        try:
+            await warm()
+            stage["status"] = "ok"
+        except Exception as e:
+            stage["status"] = "failed"
+            stage["error"] = str(e)
+            logger.error(LogFormatter.error(f"Warm-up of {name} failed", e))
+        stage["duration"] = round(time.time() - start, 3)
+        logger.info(LogFormatter.info(f"Warm-up of {name}: {stage['status']} in {stage['duration']:.1f}s"))
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness and per-stage outcome"""
+        return {
+            "ready": self.ready,
+            "duration": round((self.finished_at or time.time()) - self.started_at, 3) if self.started_at else None,
+            "stages": self.stages,
+        }
+
+    async def stop(self):
+        """Cancel a warm-up still running"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._task = None
+
+# Warm-up of this process
+warmup = WarmUp()
@@ -1,203 +1,337 @@
 from app.core.cache import cache_config
-from datetime import datetime
-from typing import List, Dict, Any
+from app.core.payload import SerializedPayload
+from app.core.refresher import BackgroundRefresher
+from app.core.singleflight import SingleFlight
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Tuple
 import datasets
 from fastapi import HTTPException
+from huggingface_hub import HfApi
+import time
 import logging
-from app.config.base import HF_ORGANIZATION
+import asyncio
+from app.config.base import HF_TOKEN, CACHE_TTL
+from app.config.hf_config import AGGREGATED_REPO
+from app.services.snapshot import LeaderboardSnapshot
+from app.services.leaderboard_query import LeaderboardQuery, QueryResult, run_query
+from app.services.leaderboard_changes import SnapshotHistory, build_changes
+from app.services.leaderboard_rankings import rankings_payload
+from app.services.leaderboard_facets import facets_payload
+from app.services.leaderboard_compare import compare_payload
+from app.services.leaderboard_pareto import pareto_payload
+from app.services.leaderboard_history import SnapshotStore
 from app.utils.logging import LogFormatter
 
 logger = logging.getLogger(__name__)
 
+# How often workers look for a newly published snapshot, in seconds
+SHARED_SNAPSHOT_POLL = 10
+# How long a worker waits for the first published snapshot, in seconds
+SHARED_SNAPSHOT_WAIT = 600
+
 class LeaderboardService:
+    _instance: Optional['LeaderboardService'] = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(LeaderboardService, cls).__new__(cls)
+        return cls._instance
+
     def __init__(self):
-        pass
-        
-    async def fetch_raw_data(self) -> List[Dict[str, Any]]:
-        """Fetch raw leaderboard data from HuggingFace dataset"""
+        if not hasattr(self, '_init_done'):
+            self._refresher = BackgroundRefresher("leaderboard snapshot", self._refresh_snapshot, CACHE_TTL)
+            self.hf_api = HfApi(token=HF_TOKEN)
+            self._history = SnapshotHistory()
+            self._store = SnapshotStore(cache_config.get_cache_path("history"))
+            self._flights = SingleFlight()
+            self._init_done = True
+
+    def _dataset_info(self):
+        """Hub metadata of the contents dataset, None if the hub cannot be reached"""
         try:
-            logger.info(LogFormatter.section("FETCHING LEADERBOARD DATA"))
-            logger.info(LogFormatter.info(f"Loading dataset from {HF_ORGANIZATION}/greek-contents"))
-            
+            return self.hf_api.dataset_info(AGGREGATED_REPO)
+        except Exception as e:
+            logger.warning(LogFormatter.warning(f"Could not get the revision of {AGGREGATED_REPO}: {e}"))
+            return None
+
+    def _build_snapshot(self, current: Optional[LeaderboardSnapshot] = None) -> LeaderboardSnapshot:
+        """Get the latest snapshot (blocking)
+
+        One worker process holds the store's refresh lock: it checks the hub,
+        stores new versions and publishes them. The other workers map the
+        published version from the store, so the data exists once in the
+        page cache however many workers serve it.
+        """
+        if self._store.acquire_refresh_lock():
+            return self._load_latest(current)
+        return self._follow_published(current)
+
+    def _load_latest(self, current: Optional[LeaderboardSnapshot] = None) -> LeaderboardSnapshot:
+        """Load the contents dataset into a columnar snapshot and publish it (blocking)
+
+        The dataset commit is checked first, at most once per cache TTL: if it
+        is the one behind the current snapshot, that snapshot is kept and
+        nothing is downloaded or rebuilt.
+        """
+        if current is not None and current.age < CACHE_TTL:
+            return current
+        info = self._dataset_info()
+        revision = info.sha if info else None
+        if current is not None:
+            if revision is None:
+                raise RuntimeError(f"Cannot check {AGGREGATED_REPO} for changes, keeping version {current.version}")
+            if revision == current.version:
+                current.mark_checked()
+                logger.info(LogFormatter.info(f"{AGGREGATED_REPO} unchanged at {revision}, keeping snapshot"))
+                if self._store.has(revision):
+                    self._store.publish(revision)
+                return current
+
+        logger.info(LogFormatter.section("FETCHING LEADERBOARD DATA"))
+        if revision and self._store.has(revision):
+            # Already in the history store, e.g. after a restart
+            logger.info(LogFormatter.info(f"Loading {AGGREGATED_REPO} at {revision} from the history store"))
+            snapshot = self._store.open_snapshot(revision)
+        else:
+            logger.info(LogFormatter.info(f"Loading dataset from {AGGREGATED_REPO} at {revision or 'latest revision'}"))
             dataset = datasets.load_dataset(
-                f"{HF_ORGANIZATION}/greek-contents",
+                AGGREGATED_REPO,
+                revision=revision,
                 cache_dir=cache_config.get_cache_path("datasets")
             )["train"]
-            
-            df = dataset.to_pandas()
-            data = df.to_dict('records')
-            
-            stats = {
-                "Total_Entries": len(data),
-                "Dataset_Size": f"{df.memory_usage(deep=True).sum() / 1024 / 1024:.1f}MB"
-            }
-            for line in LogFormatter.stats(stats, "Dataset Statistics"):
-                logger.info(line)
-                
-            return data
-            
+            # Arrow table backed by the memory-mapped dataset cache, no pandas copy
+            snapshot = LeaderboardSnapshot(dataset.with_format("arrow")[:], version=revision)
+            try:
+                self._store.save(snapshot, getattr(info, "last_modified", None))
+                # Serve the mapped files too, instead of formatted columns built in this process
+                snapshot = self._store.open_snapshot(snapshot.version)
+            except Exception as e:
+                logger.warning(LogFormatter.warning(f"Could not store leaderboard version {snapshot.version}: {e}"))
+
+        self._prepare(snapshot)
+        if self._store.has(snapshot.version):
+            self._store.publish(snapshot.version)
+        return snapshot
+
+    def _follow_published(self, current: Optional[LeaderboardSnapshot] = None) -> LeaderboardSnapshot:
+        """Map the version published by the refreshing worker (blocking)
+
+        At startup this waits for the first version to be published, taking
+        over the refresh if the lock holder goes away meanwhile.
+        """
+        deadline = time.time() + SHARED_SNAPSHOT_WAIT
+        version = self._store.current()
+        while version is None:
+            if time.time() > deadline:
+                raise RuntimeError(f"No leaderboard version published after {SHARED_SNAPSHOT_WAIT}s")
+            time.sleep(1)
+            if self._store.acquire_refresh_lock():
+                return self._load_latest(current)
+            version = self._store.current()
+
+        if current is not None and current.version == version:
+            current.mark_checked()
+            return current
+        logger.info(LogFormatter.info(f"Mapping published leaderboard version {version}"))
+        snapshot = self._store.open_snapshot(version)
+        self._prepare(snapshot)
+        return snapshot
+
+    def _prepare(self, snapshot: LeaderboardSnapshot):
+        """Get a new snapshot ready to be swapped in (blocking)"""
+        # Serialize and compress before the snapshot is swapped in, so requests never wait for it
+        for kind in ("formatted", "raw"):
+            snapshot.payload(kind).precompress()
+        self._history.record(snapshot)
+
+        stats = {
+            "Total_Entries": snapshot.num_rows,
+            "Dataset_Size": f"{snapshot.table.nbytes / 1024 / 1024:.1f}MB",
+            "Version": snapshot.version
+        }
+        for line in LogFormatter.stats(stats, "Dataset Statistics"):
+            logger.info(line)
+
+    async def _refresh_snapshot(self) -> LeaderboardSnapshot:
+        """Build a new snapshot in a worker thread, off the event loop"""
+        return await asyncio.to_thread(self._build_snapshot, self._refresher.value)
+
+    async def get_snapshot(self) -> LeaderboardSnapshot:
+        """Get the current snapshot
+
+        Only the very first call waits for the dataset. Once the snapshot is
+        older than the cache TTL it keeps being served while a new one is
+        built in the background.
+        """
+        try:
+            return await self._refresher.get()
         except Exception as e:
             logger.error(LogFormatter.error("Failed to fetch leaderboard data", e))
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def get_formatted_data(self) -> List[Dict[str, Any]]:
-        """Get formatted leaderboard data"""
+    async def get_snapshot_as_of(self, as_of: str) -> LeaderboardSnapshot:
+        """Get the snapshot of a past version, or of the version current at a date/time
+
+        Past versions are memory-mapped from the history store, only a few
+        are kept open at once.
+        """
+        try:
+            entry = self._store.resolve(as_of)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        current = await self.get_snapshot()
+        if entry["version"] == current.version:
+            return current
+        try:
+            return await self._flights.do(
+                ("history", entry["version"]),
+                lambda: asyncio.to_thread(self._store.load, entry)
+            )
+        except Exception as e:
+            logger.error(LogFormatter.error(f"Failed to open leaderboard version {entry['version']}", e))
+            raise HTTPException(status_code=500, detail=str(e))
+
+    def history_versions(self) -> List[Dict[str, Any]]:
+        """Stored leaderboard versions, oldest first"""
+        return self._store.entries()
+
+    async def model_history(self, model_name: str) -> Dict[str, Any]:
+        """Scores of a model across stored versions and model revisions"""
+        try:
+            history = await asyncio.to_thread(self._store.model_history, model_name)
+        except Exception as e:
+            logger.error(LogFormatter.error(f"Failed to read the history of {model_name}", e))
+            raise HTTPException(status_code=500, detail=str(e))
+        if not history["history"]:
+            raise HTTPException(status_code=404, detail=f"No stored leaderboard version contains {model_name}")
+        return history
+
+    def start_background_refresh(self):
+        """Pick up published snapshots in the background
+
+        The refreshing worker still checks the dataset for a new commit only
+        once per cache TTL.
+        """
+        logger.info(LogFormatter.info(f"Checking {AGGREGATED_REPO} for changes every {CACHE_TTL}s"))
+        self._refresher.start(SHARED_SNAPSHOT_POLL)
+
+    async def stop_background_refresh(self):
+        """Stop refreshing the snapshot"""
+        await self._refresher.stop()
+
+    def snapshot_info(self) -> Dict[str, Any]:
+        """Version and age of the snapshot currently served"""
+        snapshot: Optional[LeaderboardSnapshot] = self._refresher.value
+        return {
+            "version": snapshot.version if snapshot else None,
+            "created_at": datetime.fromtimestamp(snapshot.created_at, timezone.utc).isoformat() if snapshot else None,
+            "checked_at": datetime.fromtimestamp(snapshot.checked_at, timezone.utc).isoformat() if snapshot else None,
+            "age_seconds": round(snapshot.age, 1) if snapshot else None,
+            "rows": snapshot.num_rows if snapshot else 0,
+            "refreshing": self._refresher.refreshing,
+            "last_error": self._refresher.last_error
+        }
+
+    async def get_payload(
+        self,
+        snapshot: LeaderboardSnapshot,
+        kind: str,
+        wire_format: str = "json",
+        fields: Tuple[str, ...] = ()
+    ) -> SerializedPayload:
+        """Get the serialized `raw` or `formatted` leaderboard of a snapshot"""
         try:
-            logger.info(LogFormatter.section("FORMATTING LEADERBOARD DATA"))
-            
-            raw_data = await self.fetch_raw_data()
-            formatted_data = []
-            type_counts = {}
-            error_count = 0
-            
-            # Initialize progress tracking
-            total_items = len(raw_data)
-            logger.info(LogFormatter.info(f"Processing {total_items:,} entries..."))
-            
-            for i, item in enumerate(raw_data, 1):
-                try:
-                    formatted_item = await self.transform_data(item)
-                    formatted_data.append(formatted_item)
-                    
-                    # Count model types
-                    model_type = formatted_item["model"]["type"]
-                    type_counts[model_type] = type_counts.get(model_type, 0) + 1
-                    
-                except Exception as e:
-                    error_count += 1
-                    logger.error(LogFormatter.error(f"Failed to format entry {i}/{total_items}", e))
-                    continue
-                
-                # Log progress every 10%
-                if i % max(1, total_items // 10) == 0:
-                    progress = (i / total_items) * 100
-                    logger.info(LogFormatter.info(f"Progress: {LogFormatter.progress_bar(i, total_items)}"))
-            
-            # Log final statistics
-            stats = {
-                "Total_Processed": total_items,
-                "Successful": len(formatted_data),
-                "Failed": error_count
-            }
-            logger.info(LogFormatter.section("PROCESSING SUMMARY"))
-            for line in LogFormatter.stats(stats, "Processing Statistics"):
-                logger.info(line)
-            
-            # Log model type distribution
-            type_stats = {f"Type_{k}": v for k, v in type_counts.items()}
-            logger.info(LogFormatter.subsection("MODEL TYPE DISTRIBUTION"))
-            for line in LogFormatter.stats(type_stats):
-                logger.info(line)
-                
-            return formatted_data
-            
+            if snapshot.has_payload(kind, wire_format, fields):
+                return snapshot.payload(kind, wire_format, fields)
+            # First request for this format and projection: serialize once, off the event loop
+            return await self._flights.do(
+                (snapshot.version, kind, wire_format, fields),
+                lambda: asyncio.to_thread(snapshot.payload, kind, wire_format, fields)
+            )
+        except ValueError as e:
+            logger.error(LogFormatter.error("Invalid leaderboard request", e))
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
-            logger.error(LogFormatter.error("Failed to format leaderboard data", e))
+            logger.error(LogFormatter.error(f"Failed to serialize {kind} leaderboard data", e))
             raise HTTPException(status_code=500, detail=str(e))
 
-    async def transform_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Transform raw data into the format expected by the frontend"""
+    async def query(
+        self,
+        snapshot: LeaderboardSnapshot,
+        query: LeaderboardQuery,
+        wire_format: str = "json",
+        fields: Tuple[str, ...] = ()
+    ) -> QueryResult:
+        """Filter, sort and paginate the formatted leaderboard of a snapshot
+
+        This and the other query methods build their results in a worker
+        thread, so cache misses do not block the event loop.
+        """
+        try:
+            return await asyncio.to_thread(run_query, snapshot, query, wire_format, fields)
+        except ValueError as e:
+            logger.error(LogFormatter.error("Invalid leaderboard query", e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def rankings(
+        self,
+        snapshot: LeaderboardSnapshot,
+        task: str,
+        limit: int,
+        fields: Tuple[str, ...] = ()
+    ) -> SerializedPayload:
+        """Serialized top models for a task or the average score"""
+        try:
+            return await asyncio.to_thread(rankings_payload, snapshot, task, limit, fields)
+        except ValueError as e:
+            logger.error(LogFormatter.error("Invalid rankings request", e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def facets(self, snapshot: LeaderboardSnapshot, query: Optional[LeaderboardQuery] = None) -> SerializedPayload:
+        """Serialized facet counts, conditioned on the query filters if given"""
+        try:
+            return await asyncio.to_thread(facets_payload, snapshot, query)
+        except ValueError as e:
+            logger.error(LogFormatter.error("Invalid facets request", e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def compare(
+        self,
+        snapshot: LeaderboardSnapshot,
+        ids: Tuple[str, ...],
+        fields: Tuple[str, ...] = ()
+    ) -> SerializedPayload:
+        """Serialized side-by-side comparison of a few models"""
+        try:
+            return await asyncio.to_thread(compare_payload, snapshot, ids, fields)
+        except LookupError as e:
+            raise HTTPException(status_code=404, detail=str(e))
+        except ValueError as e:
+            logger.error(LogFormatter.error("Invalid comparison request", e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def pareto(
+        self,
+        snapshot: LeaderboardSnapshot,
+        task: str = "average",
+        include_co2: bool = False,
+        query: Optional[LeaderboardQuery] = None,
+        fields: Tuple[str, ...] = ()
+    ) -> SerializedPayload:
+        """Serialized score-vs-size Pareto frontier, over the models matching the query if given"""
         try:
-            # Extract model name for logging
-            model_name = data.get("fullname", "Unknown")
-            logger.debug(LogFormatter.info(f"Transforming data for model: {model_name}"))
-            
-            # Create unique ID combining model name, precision, sha and chat template status
-            unique_id = f"{data.get('fullname', 'Unknown')}_{data.get('Precision', 'Unknown')}_{data.get('Model sha', 'Unknown')}_{str(data.get('Chat Template', False))}"
-            
-            evaluations = {
-                "multifin": {
-                    "name": "MultiFin",
-                    "value": data.get("MultiFin Raw", 0),
-                    "normalized_score": data.get("MultiFin", 0)
-                },
-                "qa": {
-                    "name": "QA",
-                    "value": data.get("QA Raw", 0),
-                    "normalized_score": data.get("QA", 0)
-                },
-                "fns": {
-                    "name": "FNS",
-                    "value": data.get("FNS Raw", 0),
-                    "normalized_score": data.get("FNS", 0)
-                },
-                "finnum": {
-                    "name": "FinNum",
-                    "value": data.get("FinNum Raw", 0),
-                    "normalized_score": data.get("FinNum", 0)
-                },
-                "fintext": {
-                    "name": "FinText",
-                    "value": data.get("FinText Raw", 0),
-                    "normalized_score": data.get("FinText", 0)
-                },
-            }
-
-            features = {
-                "is_not_available_on_hub": data.get("Available on the hub", False),
-                "is_merged": data.get("Merged", False),
-                "is_moe": data.get("MoE", False),
-                "is_flagged": data.get("Flagged", False),
-                "is_highlighted_by_maintainer": data.get("Official Providers", False)
-            }
-
-            metadata = {
-                "upload_date": data.get("Upload To Hub Date"),
-                "submission_date": data.get("Submission Date"),
-                "generation": data.get("Generation"),
-                "base_model": data.get("Base Model"),
-                "hub_license": data.get("Hub License"),
-                "hub_hearts": data.get("Hub ❤️"),
-                "params_billions": data.get("#Params (B)"),
-                "co2_cost": data.get("CO₂ cost (kg)", 0)
-            }
-
-            # Clean model type by removing emojis if present
-            original_type = data.get("Type", "")
-            model_type = original_type.lower().strip()
-            
-            # Remove emojis and parentheses
-            if "(" in model_type:
-                model_type = model_type.split("(")[0].strip()
-            model_type = ''.join(c for c in model_type if not c in '🔶🟢🟩💬🤝🌸 ')
-                
-            # Map old model types to new ones
-            model_type_mapping = {
-                "fine-tuned": "fined-tuned-on-domain-specific-dataset",
-                "fine tuned": "fined-tuned-on-domain-specific-dataset",
-                "finetuned": "fined-tuned-on-domain-specific-dataset",
-                "fine_tuned": "fined-tuned-on-domain-specific-dataset",
-                "ft": "fined-tuned-on-domain-specific-dataset",
-                "finetuning": "fined-tuned-on-domain-specific-dataset",
-                "fine tuning": "fined-tuned-on-domain-specific-dataset",
-                "fine-tuning": "fined-tuned-on-domain-specific-dataset"
-            }
-
-            mapped_type = model_type_mapping.get(model_type.lower().strip(), model_type)
-            
-            if mapped_type != model_type:
-                logger.debug(LogFormatter.info(f"Model type mapped: {original_type} -> {mapped_type}"))
-            
-            transformed_data = {
-                "id": unique_id,
-                "model": {
-                    "name": data.get("fullname"),
-                    "sha": data.get("Model sha"),
-                    "precision": data.get("Precision"),
-                    "type": mapped_type,
-                    "weight_type": data.get("Weight type"),
-                    "architecture": data.get("Architecture"),
-                    "average_score": data.get("Average ⬆️"),
-                    "has_chat_template": data.get("Chat Template", False)
-                },
-                "evaluations": evaluations,
-                "features": features,
-                "metadata": metadata
-            }
-            
-            logger.debug(LogFormatter.success(f"Successfully transformed data for {model_name}"))
-            return transformed_data
-            
+            return await asyncio.to_thread(pareto_payload, snapshot, task, include_co2, query, fields)
+        except ValueError as e:
+            logger.error(LogFormatter.error("Invalid Pareto frontier request", e))
+            raise HTTPException(status_code=400, detail=str(e))
+
+    async def changes(self, snapshot: LeaderboardSnapshot, since: str) -> SerializedPayload:
+        """Serialized rows added, modified and removed since an earlier version"""
+        try:
+            return await asyncio.to_thread(build_changes, snapshot, since, self._history.get(since))
         except Exception as e:
-            logger.error(LogFormatter.error(f"Failed to transform data for {data.get('fullname', 'Unknown')}", e))
-            raise
+            logger.error(LogFormatter.error(f"Failed to compute leaderboard changes since {since}", e))
+            raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,100 @@
+"""
+Row-level changes between leaderboard snapshot versions.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from app.core.payload import SerializedPayload, serialize_json
+from app.services.snapshot import LeaderboardSnapshot
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Number of past versions a client can ask for changes since
+CHANGES_HISTORY_SIZE = 32
+
+class SnapshotHistory:
+    """Row hashes of the most recent snapshot versions, oldest evicted first
+
+    The hash tables of stored versions are memory-mapped from the history
+    store, so keeping them costs no heap.
+    """
+
+    def __init__(self, size: int = CHANGES_HISTORY_SIZE):
+        self.size = size
+        self._versions: "OrderedDict[str, pa.Table]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, snapshot: LeaderboardSnapshot):
+        """Remember the row hashes of a snapshot"""
+        hashes = snapshot.row_hashes()
+        with self._lock:
+            self._versions[snapshot.version] = hashes
+            self._versions.move_to_end(snapshot.version)
+            while len(self._versions) > self.size:
+                evicted, _ = self._versions.popitem(last=False)
+                logger.info(LogFormatter.info(f"Dropped leaderboard version {evicted} from the changes history"))
+
+    def get(self, version: str) -> Optional[pa.Table]:
+        """Row hashes of a past version, None if it is unknown or too old"""
+        with self._lock:
+            return self._versions.get(version)
+
+def build_changes(
+    snapshot: LeaderboardSnapshot,
+    since: str,
+    previous: Optional[pa.Table]
+) -> SerializedPayload:
+    """Serialize the rows added, modified and removed since a past version
+
+    Without the row hashes of that version, every row is sent as added and
+    `full_resync` tells the client to replace what it has. That response is
+    the same whatever the version asked for (`since` is null), so it is
+    built and compressed once per snapshot.
+    """
+    if previous is None:
+        logger.info(LogFormatter.info(f"Version {since} unknown, sending a full resync"))
+        return snapshot.cached_query(("changes", None), lambda: serialize_json({
+            "version": snapshot.version,
+            "since": None,
+            "full_resync": True,
+            "added": snapshot.formatted(),
+            "modified": [],
+            "removed": []
+        }).precompress())
+
+    def build():
+        current = snapshot.row_hashes()
+        current = current.append_column("position", pa.array(np.arange(current.num_rows), pa.int64()))
+        joined = current.join(
+            previous.rename_columns(["id", "previous_hash"]), "id", join_type="left outer", use_threads=False
+        )
+        is_new = pc.is_null(joined["previous_hash"])
+        is_changed = pc.fill_null(pc.not_equal(joined["hash"], joined["previous_hash"]), False)
+        # Joins do not keep row order, rows are sent in snapshot order
+        added = np.sort(pc.filter(joined["position"], is_new).to_numpy())
+        modified = np.sort(pc.filter(joined["position"], is_changed).to_numpy())
+        removed = pc.filter(previous["id"], pc.invert(pc.is_in(previous["id"], value_set=current["id"]))).to_pylist()
+
+        stats = {
+            "Since": since,
+            "Added": len(added),
+            "Modified": len(modified),
+            "Removed": len(removed)
+        }
+        for line in LogFormatter.tree(stats, "Leaderboard Changes"):
+            logger.info(line)
+        return serialize_json({
+            "version": snapshot.version,
+            "since": since,
+            "full_resync": False,
+            "added": snapshot.formatted(added) if len(added) else [],
+            "modified": snapshot.formatted(modified) if len(modified) else [],
+            "removed": removed
+        })
+
+    return snapshot.cached_query(("changes", since), build)
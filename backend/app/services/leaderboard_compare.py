@@ -0,0 +1,82 @@
+"""
+Side-by-side comparison of a few leaderboard rows: aligned scores, deltas and
+rank gaps against the first model.
+"""
+import logging
+from typing import List, Optional, Tuple
+import numpy as np
+from app.core.payload import SerializedPayload, serialize_json
+from app.services.snapshot import RANKING_TASKS, LeaderboardSnapshot
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of models compared in one request
+MAX_COMPARED_MODELS = 20
+
+def _values(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    """Rows of a float matrix as lists, NaN as None"""
+    return [[None if np.isnan(value) else float(value) for value in row] for row in matrix]
+
+def compare_payload(
+    snapshot: LeaderboardSnapshot,
+    ids: Tuple[str, ...],
+    fields: Tuple[str, ...] = ()
+) -> SerializedPayload:
+    """Serialized comparison of the given rows, the first one being the reference
+
+    Rows are found through the snapshot's id index. Scores and ranks are
+    gathered as a (models x tasks) matrix, so deltas and rank gaps are one
+    vectorized subtraction. Unknown ids are listed under `missing`.
+    """
+    if not ids:
+        raise ValueError("No model ids to compare")
+    if len(ids) > MAX_COMPARED_MODELS:
+        raise ValueError(f"At most {MAX_COMPARED_MODELS} models can be compared at once")
+
+    def build():
+        positions = snapshot.row_positions()
+        found = [row_id for row_id in ids if row_id in positions]
+        missing = [row_id for row_id in ids if row_id not in positions]
+        if not found:
+            raise LookupError(f"Unknown model ids: {', '.join(ids)}")
+        rows = np.array([positions[row_id] for row_id in found], dtype=np.int64)
+
+        tasks = list(RANKING_TASKS)
+        scores = np.column_stack([snapshot.numeric(path)[rows] for path in RANKING_TASKS.values()])
+        ranks = np.column_stack([snapshot.numeric(f"rankings.{task}.rank")[rows] for task in tasks])
+        deltas = scores - scores[0]
+        rank_gaps = ranks - ranks[0]
+        # Best model per task among those compared, None if none has a score
+        best = [
+            found[int(np.nanargmax(column))] if not np.isnan(column).all() else None
+            for column in scores.T
+        ]
+
+        logger.info(LogFormatter.info(f"Compared {len(found)} models over {len(tasks)} tasks"))
+        return serialize_json({
+            "reference": found[0],
+            "tasks": tasks,
+            "missing": missing,
+            "best": dict(zip(tasks, best)),
+            "models": [
+                {
+                    "id": row_id,
+                    "scores": dict(zip(tasks, score_row)),
+                    "deltas": dict(zip(tasks, delta_row)),
+                    "ranks": {task: None if rank is None else int(rank) for task, rank in zip(tasks, rank_row)},
+                    "rank_gaps": {task: None if gap is None else int(gap) for task, gap in zip(tasks, gap_row)},
+                    "row": row,
+                }
+                for row_id, score_row, delta_row, rank_row, gap_row, row in zip(
+                    found,
+                    _values(scores),
+                    _values(deltas),
+                    _values(ranks),
+                    _values(rank_gaps),
+                    snapshot.formatted(rows, fields),
+                )
+            ],
+        })
+
+    return snapshot.cached_query(("compare", ids, fields), build)
@@ -0,0 +1,86 @@
+"""
+Facet counts (models per type, precision, params bucket, feature...) over a
+leaderboard snapshot, from packed bitmap indexes built once per snapshot.
+"""
+import logging
+from typing import Dict, Optional
+import numpy as np
+from app.core.payload import SerializedPayload, serialize_json
+from app.services.snapshot import LeaderboardSnapshot
+from app.services.leaderboard_query import LeaderboardQuery, filter_mask
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Facet name -> categorical formatted column
+VALUE_FACETS = {
+    "types": "model.type",
+    "precisions": "model.precision",
+    "architectures": "model.architecture",
+    "licenses": "metadata.hub_license",
+}
+
+# Same buckets as the frontend quick filters, [low, high) in billions of parameters
+PARAMS_BUCKETS = {
+    "edge": (0, 3),
+    "small": (3, 7),
+    "medium": (7, 65),
+    "large": (65, 141),
+}
+
+FEATURES = [
+    "is_highlighted_by_maintainer",
+    "is_moe",
+    "is_merged",
+    "is_flagged",
+    "is_not_available_on_hub",
+]
+
+def _pack(mask: np.ndarray) -> np.ndarray:
+    return np.packbits(mask)
+
+def _count(bits: np.ndarray, condition: Optional[np.ndarray]) -> int:
+    """Set bits of a bitmap, restricted to the condition bitmap if given"""
+    if condition is not None:
+        bits = bits & condition
+    return int(np.bitwise_count(bits).sum())
+
+def facet_bitmaps(snapshot: LeaderboardSnapshot) -> Dict[str, Dict[str, np.ndarray]]:
+    """One packed bitmap per facet value, built once per snapshot"""
+    def build():
+        bitmaps = {
+            facet: {value: _pack(mask) for value, mask in snapshot.value_masks(path).items()}
+            for facet, path in VALUE_FACETS.items()
+        }
+        bitmaps["params"] = {
+            bucket: _pack(snapshot.range_mask("metadata.params_billions", low, high))
+            for bucket, (low, high) in PARAMS_BUCKETS.items()
+        }
+        bitmaps["features"] = {
+            feature: _pack(snapshot.flag(f"features.{feature}"))
+            for feature in FEATURES
+        }
+        return bitmaps
+    return snapshot.memoize("facets", "bitmaps", build)
+
+def facets_payload(snapshot: LeaderboardSnapshot, query: Optional[LeaderboardQuery] = None) -> SerializedPayload:
+    """Serialized facet counts, over the rows matching the query filters if given
+
+    Counting under a filter is a bitwise AND with the filter's bitmap per
+    facet value, cached per snapshot and filter.
+    """
+    filters = query.filters if query is not None else None
+
+    def build():
+        bitmaps = facet_bitmaps(snapshot)
+        mask = filter_mask(snapshot, query) if query is not None else None
+        condition = _pack(mask) if mask is not None else None
+        total = snapshot.num_rows if mask is None else int(np.count_nonzero(mask))
+        counts = {
+            facet: {str(value): _count(bits, condition) for value, bits in values.items()}
+            for facet, values in bitmaps.items()
+        }
+        logger.info(LogFormatter.info(f"Counted facets over {total:,} rows"))
+        return serialize_json({"total": total, **counts})
+
+    return snapshot.cached_query(("facets", filters), build)
@@ -0,0 +1,347 @@
+"""
+Append-only on-disk history of leaderboard snapshots, one Arrow IPC file per
+dataset commit, read back memory-mapped.
+
+The store is also how uvicorn workers share one snapshot: a single worker
+holds the refresh lock and publishes each new version in `CURRENT`, the
+others map that version's files instead of loading the dataset themselves.
+"""
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import pyarrow as pa
+import pyarrow.compute as pc
+from app.core.compression import ENCODERS
+from app.core.payload import SerializedPayload
+from app.services.snapshot import EVALUATION_TASKS, FORMATTER_VERSION, LeaderboardSnapshot
+from app.utils.logging import LogFormatter
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.jsonl"
+# Version currently served, replaced atomically by the refreshing worker
+CURRENT_FILE = "CURRENT"
+# Held by the one worker that checks the hub and publishes new versions
+REFRESH_LOCK_FILE = "refresh.lock"
+# Past snapshots kept open (memory-mapped, with their indexes) at once
+LOADED_SNAPSHOTS = 4
+# Per-model histories kept in memory
+MODEL_HISTORY_CACHE_SIZE = 128
+# Dataset columns read for a model's score history
+HISTORY_COLUMNS = ["fullname", "Model sha", "Precision", "Average ⬆️"] + [name for _, name in EVALUATION_TASKS]
+# Payloads serialized and compressed once per version, by the process that stores it
+STORED_PAYLOADS = ("formatted", "raw")
+
+def _parse_time(value: str) -> datetime:
+    """ISO date or date-time, naive values are taken as UTC"""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+class SnapshotStore:
+    """Versions of the leaderboard persisted as memory-mappable Arrow files
+
+    Each version is written once as `<version>.arrow`, then listed in
+    `manifest.jsonl`. The manifest is only ever appended to, so readers
+    always see complete files. Next to the raw table are the files derived
+    from it, named after the formatter version: the formatted columns, the
+    row hashes, and the JSON payloads with their compressed variants. Every
+    worker maps these instead of building its own copy. Derived files of
+    another formatter version are ignored and rebuilt from the raw table.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.manifest = root / MANIFEST_FILE
+        self._lock = threading.Lock()
+        self._entries: List[Dict[str, Any]] = []
+        self._manifest_size = -1
+        self._loaded: "OrderedDict[str, LeaderboardSnapshot]" = OrderedDict()
+        self._model_histories: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock_file = None
+
+    def entries(self) -> List[Dict[str, Any]]:
+        """Manifest entries, oldest first, re-read when the file grew"""
+        with self._lock:
+            size = self.manifest.stat().st_size if self.manifest.exists() else 0
+            if size != self._manifest_size:
+                entries = []
+                if size:
+                    with open(self.manifest, "r") as f:
+                        for line in f:
+                            if line.strip():
+                                entries.append(json.loads(line))
+                self._entries = entries
+                self._manifest_size = size
+            return list(self._entries)
+
+    def has(self, version: str) -> bool:
+        return any(entry["version"] == version for entry in self.entries())
+
+    def _path(self, version: str) -> Path:
+        return self.root / f"{version}.arrow"
+
+    def _derived_path(self, version: str, name: str, suffix: str = "arrow") -> Path:
+        return self.root / f"{version}.{name}.{FORMATTER_VERSION}.{suffix}"
+
+    def _formatted_path(self, version: str) -> Path:
+        return self._derived_path(version, "formatted")
+
+    def _payload_path(self, version: str, kind: str, encoding: Optional[str] = None) -> Path:
+        return self._derived_path(version, f"payload-{kind}", f"json.{encoding}" if encoding else "json")
+
+    @staticmethod
+    def _write_table(table: pa.Table, path: Path):
+        """Write an uncompressed IPC file, so it can be memory-mapped without copies"""
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        with pa.OSFile(str(tmp_path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _write_bytes(data: bytes, path: Path):
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _map_bytes(path: Path) -> memoryview:
+        return memoryview(pa.memory_map(str(path), "r").read_buffer()).cast("B")
+
+    def save(self, snapshot: LeaderboardSnapshot, committed_at: Optional[datetime] = None):
+        """Persist a snapshot unless its version is already stored (blocking)"""
+        if self.has(snapshot.version):
+            return
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(snapshot.version)
+        self._write_table(snapshot.table, path)
+        self._store_derived(snapshot)
+
+        entry = {
+            "version": snapshot.version,
+            "created_at": datetime.fromtimestamp(snapshot.created_at, timezone.utc).isoformat(),
+            "committed_at": committed_at.astimezone(timezone.utc).isoformat() if committed_at else None,
+            "rows": snapshot.num_rows,
+            "file": path.name,
+        }
+        with self._lock:
+            with open(self.manifest, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+        logger.info(LogFormatter.success(f"Stored leaderboard version {snapshot.version} ({path.stat().st_size / 1024:.1f}KB)"))
+
+    def resolve(self, as_of: str) -> Dict[str, Any]:
+        """Entry for a version, a unique version prefix, or the version current at a date/time
+
+        Raises LookupError if nothing matches and ValueError for an ambiguous
+        version prefix.
+        """
+        entries = self.entries()
+        matches = [entry for entry in entries if entry["version"].startswith(as_of)]
+        if len(matches) == 1 or any(entry["version"] == as_of for entry in matches):
+            return next((entry for entry in matches if entry["version"] == as_of), matches[0])
+        if len(matches) > 1:
+            raise ValueError(f"Ambiguous version prefix: {as_of}")
+
+        try:
+            point = _parse_time(as_of)
+        except ValueError:
+            raise LookupError(f"Unknown leaderboard version: {as_of}")
+        current = None
+        for entry in entries:
+            if _parse_time(entry["committed_at"] or entry["created_at"]) <= point:
+                current = entry
+        if current is None:
+            raise LookupError(f"No leaderboard version as of {as_of}")
+        return current
+
+    def open_table(self, version: str) -> pa.Table:
+        """Table of a stored version, backed by a memory map of its file"""
+        source = pa.memory_map(str(self._path(version)), "r")
+        return pa.ipc.open_file(source).read_all()
+
+    def open_formatted(self, version: str) -> Optional[Dict[str, pa.ChunkedArray]]:
+        """Memory-mapped formatted columns of a stored version, None if they were not stored"""
+        path = self._formatted_path(version)
+        if not path.exists():
+            return None
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        return {name: table.column(name) for name in table.column_names}
+
+    def open_row_hashes(self, version: str) -> Optional[pa.Table]:
+        """Memory-mapped row hashes of a stored version, None if they were not stored"""
+        path = self._derived_path(version, "rowhashes")
+        if not path.exists():
+            return None
+        return pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+
+    def open_payloads(self, version: str) -> Dict[Tuple[str, str], SerializedPayload]:
+        """Memory-mapped JSON payloads of a stored version, with the compressed variants that were stored"""
+        payloads = {}
+        for kind in STORED_PAYLOADS:
+            path = self._payload_path(version, kind)
+            if not path.exists():
+                continue
+            payload = SerializedPayload(self._map_bytes(path))
+            for encoding in ENCODERS:
+                variant = self._payload_path(version, kind, encoding)
+                if variant.exists():
+                    payload.variants[encoding] = self._map_bytes(variant)
+            payloads[(kind, "json")] = payload
+        return payloads
+
+    def _store_derived(self, snapshot: LeaderboardSnapshot):
+        """Write the files derived from a stored version, dropping those of other formatter versions (blocking)
+
+        The formatted columns are written last: once they exist, so does
+        everything else.
+        """
+        version = snapshot.version
+        for kind in STORED_PAYLOADS:
+            payload = snapshot.payload(kind).precompress()
+            self._write_bytes(payload.body, self._payload_path(version, kind))
+            for encoding, body in payload.variants.items():
+                self._write_bytes(body, self._payload_path(version, kind, encoding))
+        self._write_table(snapshot.row_hashes(), self._derived_path(version, "rowhashes"))
+        self._write_table(pa.table(snapshot.formatted_columns), self._formatted_path(version))
+        for path in self.root.glob(f"{version}.*"):
+            if path != self._path(version) and f".{FORMATTER_VERSION}." not in path.name and ".tmp" not in path.suffix:
+                path.unlink(missing_ok=True)
+
+    def open_snapshot(self, version: str) -> LeaderboardSnapshot:
+        """Snapshot of a stored version, with its columns, row hashes and payloads mapped from disk
+
+        Derived files missing for the current formatter version are built and
+        stored first.
+        """
+        formatted = self.open_formatted(version)
+        if formatted is None:
+            logger.info(LogFormatter.info(f"Formatting stored leaderboard version {version} ({FORMATTER_VERSION})"))
+            snapshot = LeaderboardSnapshot(self.open_table(version), version=version)
+            try:
+                self._store_derived(snapshot)
+            except OSError as e:
+                logger.warning(LogFormatter.warning(f"Could not store formatted columns of {version}: {e}"))
+                return snapshot
+            formatted = self.open_formatted(version)
+        return LeaderboardSnapshot(
+            self.open_table(version),
+            version=version,
+            formatted_columns=formatted,
+            row_hashes=self.open_row_hashes(version),
+            payloads=self.open_payloads(version)
+        )
+
+    def read(self, entry: Dict[str, Any]) -> LeaderboardSnapshot:
+        """Snapshot of a stored version (blocking)"""
+        snapshot = self.open_snapshot(entry["version"])
+        snapshot.created_at = snapshot.checked_at = _parse_time(entry["created_at"]).timestamp()
+        return snapshot
+
+    def load(self, entry: Dict[str, Any]) -> LeaderboardSnapshot:
+        """Snapshot of a stored version, keeping the most recently used ones open (blocking)"""
+        version = entry["version"]
+        with self._lock:
+            if version in self._loaded:
+                self._loaded.move_to_end(version)
+                return self._loaded[version]
+        snapshot = self.read(entry)
+        with self._lock:
+            self._loaded[version] = snapshot
+            while len(self._loaded) > LOADED_SNAPSHOTS:
+                self._loaded.popitem(last=False)
+        logger.info(LogFormatter.info(f"Opened leaderboard version {version} from history"))
+        return snapshot
+
+    def current(self) -> Optional[str]:
+        """Version published as currently served, None if there is none yet"""
+        try:
+            return (self.root / CURRENT_FILE).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, version: str):
+        """Atomically point CURRENT at a stored version"""
+        path = self.root / CURRENT_FILE
+        tmp_path = path.with_suffix(f".tmp{os.getpid()}")
+        tmp_path.write_text(version)
+        os.replace(tmp_path, path)
+
+    def acquire_refresh_lock(self) -> bool:
+        """Try to become the process that refreshes and publishes versions
+
+        The lock is held until the process exits, then another worker takes
+        over on its next refresh. Without fcntl every process refreshes
+        on its own.
+        """
+        if fcntl is None or self._lock_file is not None:
+            return True
+        self.root.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.root / REFRESH_LOCK_FILE, "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(LogFormatter.info(f"Process {os.getpid()} refreshes the shared leaderboard snapshot"))
+        return True
+
+    def model_history(self, model_name: str) -> Dict[str, Any]:
+        """Scores of a model in every stored version, grouped by model revision (blocking)
+
+        Only the score columns of each version are read from the mapped files.
+        """
+        entries = self.entries()
+        key = (model_name, len(entries))
+        with self._lock:
+            if key in self._model_histories:
+                self._model_histories.move_to_end(key)
+                return self._model_histories[key]
+
+        points = []
+        for entry in entries:
+            table = self.open_table(entry["version"])
+            columns = [name for name in HISTORY_COLUMNS if name in table.column_names]
+            if "fullname" not in columns:
+                continue
+            table = table.select(columns)
+            rows = table.filter(pc.equal(table["fullname"], model_name)).to_pylist()
+            for row in rows:
+                points.append({
+                    "version": entry["version"],
+                    "committed_at": entry["committed_at"],
+                    "created_at": entry["created_at"],
+                    "revision": row.get("Model sha"),
+                    "precision": row.get("Precision"),
+                    "average_score": row.get("Average ⬆️"),
+                    "scores": {key: row.get(name) for key, name in EVALUATION_TASKS},
+                })
+
+        revisions: Dict[str, Dict[str, Any]] = {}
+        for point in points:
+            revision = revisions.setdefault(point["revision"], {
+                "revision": point["revision"],
+                "first_version": point["version"],
+                "versions": [],
+            })
+            revision["last_version"] = point["version"]
+            if point["version"] not in revision["versions"]:
+                revision["versions"].append(point["version"])
+
+        history = {"model": model_name, "revisions": list(revisions.values()), "history": points}
+        with self._lock:
+            self._model_histories[key] = history
+            while len(self._model_histories) > MODEL_HISTORY_CACHE_SIZE:
+                self._model_histories.popitem(last=False)
+        return history
@@ -0,0 +1,87 @@
+"""
+Pareto frontier of a leaderboard snapshot: models for which no other model is
+at most as large (and, optionally, as costly to evaluate) while scoring at
+least as high.
+"""
+import bisect
+import logging
+from typing import Optional, Tuple
+import numpy as np
+from app.core.payload import SerializedPayload, serialize_json
+from app.services.snapshot import LeaderboardSnapshot
+from app.services.leaderboard_query import LeaderboardQuery, filter_mask
+from app.services.leaderboard_rankings import task_path
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+PARAMS_PATH = "metadata.params_billions"
+CO2_PATH = "metadata.co2_cost"
+
+def pareto_front(sizes: np.ndarray, scores: np.ndarray, costs: Optional[np.ndarray] = None) -> np.ndarray:
+    """Positions of the non-dominated points, minimizing size and cost and maximizing score
+
+    Distinct points are swept in (size, -score, cost) order, so anything that
+    dominates a point comes before it. The sweep keeps the (score, cost)
+    staircase of the frontier so far, sorted by score with increasing cost:
+    a point is dominated if the cheapest earlier point scoring at least as
+    high costs no more. O(n log n) searches; identical points share their fate.
+    """
+    if costs is None:
+        costs = np.zeros_like(sizes)
+    points, inverse = np.unique(np.column_stack((sizes, -scores, costs)), axis=0, return_inverse=True)
+    efficient = np.zeros(len(points), dtype=bool)
+    front_scores, front_costs = [], []
+    for i, (_, negated_score, cost) in enumerate(points):
+        score = -negated_score
+        at = bisect.bisect_left(front_scores, score)
+        if at < len(front_scores) and front_costs[at] <= cost:
+            continue
+        efficient[i] = True
+        # Drop staircase steps the new point dominates: lower score, higher cost
+        start = bisect.bisect_left(front_costs, cost)
+        stop = bisect.bisect_right(front_scores, score)
+        del front_scores[start:stop], front_costs[start:stop]
+        front_scores.insert(start, score)
+        front_costs.insert(start, cost)
+    return np.flatnonzero(efficient[inverse.ravel()])
+
+def pareto_payload(
+    snapshot: LeaderboardSnapshot,
+    task: str = "average",
+    include_co2: bool = False,
+    query: Optional[LeaderboardQuery] = None,
+    fields: Tuple[str, ...] = ()
+) -> SerializedPayload:
+    """Serialized Pareto-efficient models, smallest first, cached per snapshot and filter
+
+    Models without a size, score (or CO₂ cost when it is an objective) are left out.
+    """
+    score_path = task_path(task)
+    filters = query.filters if query is not None else None
+
+    def build():
+        columns = [snapshot.numeric(PARAMS_PATH), snapshot.numeric(score_path)]
+        if include_co2:
+            columns.append(snapshot.numeric(CO2_PATH))
+        mask = filter_mask(snapshot, query) if query is not None else None
+        candidates = ~np.logical_or.reduce([np.isnan(column) for column in columns])
+        if mask is not None:
+            candidates &= mask
+        rows = np.flatnonzero(candidates)
+
+        front = rows[pareto_front(*(column[rows] for column in columns))]
+        front = front[np.lexsort((-columns[1][front], columns[0][front]))]
+        logger.info(LogFormatter.info(f"Pareto frontier of {len(rows):,} models has {len(front)} models"))
+        return serialize_json({
+            "task": task,
+            "objectives": {
+                PARAMS_PATH: "min",
+                score_path: "max",
+                **({CO2_PATH: "min"} if include_co2 else {}),
+            },
+            "candidates": len(rows),
+            "models": snapshot.formatted(front, fields) if len(front) else [],
+        })
+
+    return snapshot.cached_query(("pareto", task, include_co2, filters, fields), build)
@@ -0,0 +1,156 @@
+"""
+Server-side filtering, sorting and pagination over a leaderboard snapshot.
+"""
+import json
+import base64
+import logging
+from dataclasses import dataclass, replace
+from typing import Optional, Tuple
+import numpy as np
+from app.core.payload import SerializedPayload, serialize_json, serialize_table
+from app.services.snapshot import LeaderboardSnapshot
+from app.services.leaderboard_search import search_mask
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Largest page of query results, also the page size when none is given
+MAX_PAGE_SIZE = 1000
+
+# Same default ordering as the frontend table
+DEFAULT_SORT: Tuple[Tuple[str, bool], ...] = (("model.average_score", True),)
+
+@dataclass(frozen=True)
+class LeaderboardQuery:
+    """Filters, sort keys and page requested for the formatted leaderboard"""
+    precisions: Tuple[str, ...] = ()
+    types: Tuple[str, ...] = ()
+    params_min: Optional[float] = None  # inclusive
+    params_max: Optional[float] = None  # exclusive, like the quick filter buckets
+    features: Tuple[str, ...] = ()
+    exclude_features: Tuple[str, ...] = ()
+    search: Optional[str] = None
+    sort: Tuple[Tuple[str, bool], ...] = DEFAULT_SORT
+    offset: int = 0
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
+
+    @property
+    def filters(self) -> tuple:
+        """The part of the query that selects rows, independent of order and page"""
+        return (
+            self.precisions,
+            self.types,
+            self.params_min,
+            self.params_max,
+            self.features,
+            self.exclude_features,
+            self.search,
+        )
+
+@dataclass(frozen=True)
+class QueryResult:
+    """One serialized page of query results"""
+    payload: SerializedPayload
+    total: int
+    next_cursor: Optional[str]
+
+def parse_sort(value: Optional[str]) -> Tuple[Tuple[str, bool], ...]:
+    """Parse `-model.average_score,metadata.params_billions` into sort keys"""
+    if not value:
+        return DEFAULT_SORT
+    keys = []
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        descending = part.startswith("-")
+        keys.append((part.lstrip("+-"), descending))
+    return tuple(keys) or DEFAULT_SORT
+
+def encode_cursor(version: str, offset: int) -> str:
+    """Opaque cursor pointing at a position in a given snapshot version"""
+    raw = json.dumps({"v": version, "o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, version: str) -> int:
+    """Resolve a cursor to an offset, rejecting cursors from another snapshot"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        cursor_version, offset = data["v"], int(data["o"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if cursor_version != version:
+        raise ValueError("Cursor refers to an outdated leaderboard version, restart pagination")
+    return offset
+
+def _union(masks, values) -> np.ndarray:
+    """Rows matching any of the values"""
+    result = None
+    for value in values:
+        mask = masks.get(value)
+        if mask is not None:
+            result = mask.copy() if result is None else result | mask
+    return result
+
+def filter_mask(snapshot: LeaderboardSnapshot, query: LeaderboardQuery) -> Optional[np.ndarray]:
+    """Combine the per-snapshot column indexes selected by the query filters"""
+    masks = []
+    if query.precisions:
+        masks.append(_union(snapshot.value_masks("model.precision"), query.precisions))
+    if query.types:
+        masks.append(_union(snapshot.value_masks("model.type"), query.types))
+    if query.params_min is not None or query.params_max is not None:
+        masks.append(snapshot.range_mask("metadata.params_billions", query.params_min, query.params_max))
+    for feature in query.features:
+        masks.append(snapshot.flag(f"features.{feature}"))
+    for feature in query.exclude_features:
+        masks.append(~snapshot.flag(f"features.{feature}"))
+    if query.search:
+        mask = search_mask(snapshot, query.search)
+        if mask is not None:
+            masks.append(mask)
+
+    if not masks:
+        return None
+    if any(mask is None for mask in masks):
+        return np.zeros(snapshot.num_rows, dtype=bool)
+    return np.logical_and.reduce(masks)
+
+def matching_rows(snapshot: LeaderboardSnapshot, query: LeaderboardQuery) -> np.ndarray:
+    """Indices of the rows matching the query filters, in sort order"""
+    def build():
+        order = snapshot.sort_order(query.sort)
+        mask = filter_mask(snapshot, query)
+        return order if mask is None else order[mask[order]]
+    return snapshot.cached_query(("rows", query.filters, query.sort), build)
+
+def run_query(
+    snapshot: LeaderboardSnapshot,
+    query: LeaderboardQuery,
+    wire_format: str = "json",
+    fields: Tuple[str, ...] = ()
+) -> QueryResult:
+    """Serialize one page of the formatted leaderboard, cached per query shape, format and fields
+
+    Pages hold at most MAX_PAGE_SIZE rows, so every cached page is bounded.
+    """
+    if query.cursor:
+        query = replace(query, offset=decode_cursor(query.cursor, snapshot.version), cursor=None)
+    if query.limit is None or query.limit > MAX_PAGE_SIZE:
+        query = replace(query, limit=MAX_PAGE_SIZE)
+
+    def build():
+        rows = matching_rows(snapshot, query)
+        stop = min(len(rows), query.offset + query.limit)
+        page = rows[query.offset:stop]
+        next_cursor = encode_cursor(snapshot.version, stop) if stop < len(rows) else None
+        logger.info(LogFormatter.info(f"Query matched {len(rows):,} rows, returning {len(page):,}"))
+        if wire_format == "json":
+            payload = serialize_json(snapshot.formatted(page, fields))
+        else:
+            payload = serialize_table(snapshot.formatted_table(page, fields), wire_format)
+        return QueryResult(payload, len(rows), next_cursor)
+
+    return snapshot.cached_query(("page", query, wire_format, fields), build)
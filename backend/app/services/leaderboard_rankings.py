@@ -0,0 +1,58 @@
+"""
+Per-task top-k over a leaderboard snapshot. Dense ranks and percentiles are
+part of the formatted rows (`rankings.<task>`), see snapshot.RANKING_TASKS.
+"""
+import logging
+from typing import Tuple
+import numpy as np
+from app.core.payload import SerializedPayload, serialize_json
+from app.services.snapshot import RANKING_TASKS, LeaderboardSnapshot
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k best scores, best first, ties in row order
+
+    argpartition selects the candidates, so only those are sorted.
+    """
+    scored = np.flatnonzero(~np.isnan(scores))
+    k = min(k, len(scored))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = scored
+    if k < len(scored):
+        partitioned = np.argpartition(-scores[scored], k - 1)
+        threshold = scores[scored[partitioned[k - 1]]]
+        # Keep everything tied with the k-th score so ties resolve by row order
+        candidates = scored[scores[scored] >= threshold]
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+def task_path(task: str) -> str:
+    """Formatted column holding the score ranked for a task"""
+    if task not in RANKING_TASKS:
+        raise ValueError(f"Unknown task: {task}. Expected one of: {', '.join(RANKING_TASKS)}")
+    return RANKING_TASKS[task]
+
+def rankings_payload(
+    snapshot: LeaderboardSnapshot,
+    task: str,
+    limit: int,
+    fields: Tuple[str, ...] = ()
+) -> SerializedPayload:
+    """Serialized best `limit` rows for a task, cached per snapshot"""
+    path = task_path(task)
+
+    def build():
+        scores = snapshot.numeric(path)
+        best = top_k(scores, limit)
+        logger.info(LogFormatter.info(f"Selected top {len(best)} models for {task}"))
+        return serialize_json({
+            "task": task,
+            "score_field": path,
+            "scored": int(np.count_nonzero(~np.isnan(scores))),
+            "models": snapshot.formatted(best, fields) if len(best) else []
+        })
+
+    return snapshot.cached_query(("rankings", task, limit, fields), build)
@@ -0,0 +1,185 @@
+"""
+Indexed search over a leaderboard snapshot, using the same query syntax as the
+frontend search bar: `;`-separated alternatives, each made of `@field:value`
+filters plus free text (or a regex) matched against the model name.
+"""
+import re
+import time
+import logging
+import regex
+try:
+    from re import _parser as _regex_parser
+except ImportError:  # Python < 3.11
+    import sre_parse as _regex_parser
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pyarrow.compute as pc
+from app.services.snapshot import LeaderboardSnapshot
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Search field -> formatted column, as in searchUtils.getFieldPath
+SEARCH_FIELDS = {
+    "precision": "model.precision",
+    "architecture": "model.architecture",
+    "license": "metadata.hub_license",
+    "type": "model.type",
+}
+TEXT_SEARCH_FIELD = "model.name"
+# Seconds a regex may spend matching the values of a column, per search
+REGEX_SEARCH_TIMEOUT = 1.0
+
+_PREFIX_PATTERN = re.compile(r"@\w+:")
+_REGEX_SPECIAL_CHARS = re.compile(r"[\\^$.*+?()[\]{}|]")
+_TOKEN_SEPARATOR = re.compile(r"[^0-9a-z]+")
+
+def looks_like_regex(value: str) -> bool:
+    """Same heuristic as the frontend: any regex metacharacter"""
+    return bool(_REGEX_SPECIAL_CHARS.search(value))
+
+def parse_search_query(query: str) -> Tuple[List[Tuple[str, str]], str]:
+    """Split one search group into (column path, value) filters and remaining text"""
+    special_searches = []
+    remaining_text = query
+    for prefix in _PREFIX_PATTERN.findall(query):
+        field = prefix[1:-1]
+        if field not in SEARCH_FIELDS:
+            raise ValueError(f"Unknown search field: @{field}")
+
+        def extract(match, field=field):
+            special_searches.append((SEARCH_FIELDS[field], match.group(1)))
+            return ""
+
+        remaining_text = re.sub(f"{re.escape(prefix)}([^\\s@]+)", extract, remaining_text)
+    return special_searches, remaining_text.strip()
+
+def _trigrams(value: str) -> set:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+def _required_literals(pattern: str) -> List[str]:
+    """Literal substrings every match of the regex must contain (conservative)
+
+    Taken from the parsed pattern, so escapes are resolved the way `re` does:
+    only runs of plain characters at the top level count, anything else
+    (class, group, repeat, alternation, anchor) ends the run.
+    """
+    try:
+        parsed = _regex_parser.parse(pattern)
+    except re.error:
+        return []
+    literals, run = [], []
+    for opcode, value in parsed:
+        if opcode == _regex_parser.LITERAL:
+            run.append(chr(value))
+        else:
+            literals.append("".join(run))
+            run = []
+    literals.append("".join(run))
+    return [literal.lower() for literal in literals if len(literal) >= 3]
+
+class FieldIndex:
+    """Token and trigram indexes over the distinct values of one column"""
+
+    def __init__(self, snapshot: LeaderboardSnapshot, path: str):
+        encoded = pc.cast(snapshot.formatted_column(path), "string").combine_chunks().dictionary_encode()
+        self.codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False)
+        self.values = [value.lower() for value in encoded.dictionary.to_pylist()]
+
+        trigrams: Dict[str, List[int]] = {}
+        tokens: Dict[str, List[int]] = {}
+        for value_id, value in enumerate(self.values):
+            for trigram in _trigrams(value):
+                trigrams.setdefault(trigram, []).append(value_id)
+            for token in set(_TOKEN_SEPARATOR.split(value)):
+                if token:
+                    tokens.setdefault(token, []).append(value_id)
+        self.trigrams = {key: np.array(ids, dtype=np.int64) for key, ids in trigrams.items()}
+        self.tokens = {key: np.array(ids, dtype=np.int64) for key, ids in tokens.items()}
+
+    def _all(self) -> np.ndarray:
+        return np.arange(len(self.values), dtype=np.int64)
+
+    def _with_literals(self, literals: List[str]) -> np.ndarray:
+        """Value ids that may contain all the literals, from the trigram postings"""
+        candidates = None
+        postings = [
+            self.trigrams.get(trigram, np.empty(0, dtype=np.int64))
+            for literal in literals
+            for trigram in _trigrams(literal)
+        ]
+        for posting in sorted(postings, key=len):
+            candidates = posting if candidates is None else np.intersect1d(candidates, posting, assume_unique=True)
+            if not len(candidates):
+                break
+        return self._all() if candidates is None else candidates
+
+    def _substring_candidates(self, needle: str) -> np.ndarray:
+        if len(needle) >= 3:
+            return self._with_literals([needle])
+        if needle.isalnum():
+            # Short needles can only match inside a token: scan the vocabulary, not the rows
+            matching = [ids for token, ids in self.tokens.items() if needle in token]
+            return np.unique(np.concatenate(matching)) if matching else np.empty(0, dtype=np.int64)
+        return self._all()
+
+    def contains(self, needle: str) -> np.ndarray:
+        """Row mask of values containing the substring (case-insensitive)"""
+        needle = needle.lower()
+        matched = [i for i in self._substring_candidates(needle) if needle in self.values[i]]
+        return self._rows(matched)
+
+    def regex(self, pattern: str) -> np.ndarray:
+        """Row mask of values matching the regex (case-insensitive)
+
+        Patterns are accepted as `re` parses them, as in the frontend, but run
+        with the `regex` engine: it releases the GIL while matching and stops
+        at a deadline, so a catastrophic pattern cannot stall the worker.
+        Raises ValueError if matching takes longer than REGEX_SEARCH_TIMEOUT.
+        """
+        try:
+            re.compile(pattern)
+            compiled = regex.compile(pattern, regex.IGNORECASE | regex.V0)
+        except (re.error, regex.error):
+            # Invalid regexes fall back to a plain substring search, as in the frontend
+            return self.contains(pattern)
+        candidates = self._with_literals(_required_literals(pattern))
+        deadline = time.monotonic() + REGEX_SEARCH_TIMEOUT
+        matched = []
+        try:
+            for i in candidates:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    raise TimeoutError
+                if compiled.search(self.values[i], timeout=timeout, concurrent=True):
+                    matched.append(i)
+        except TimeoutError:
+            raise ValueError(f"Regex search took longer than {REGEX_SEARCH_TIMEOUT}s: {pattern}")
+        return self._rows(matched)
+
+    def _rows(self, value_ids: List[int]) -> np.ndarray:
+        return np.isin(self.codes, np.asarray(value_ids, dtype=np.int64))
+
+def field_index(snapshot: LeaderboardSnapshot, path: str) -> FieldIndex:
+    """Per-snapshot search index of a column"""
+    return snapshot.memoize("search", path, lambda: FieldIndex(snapshot, path))
+
+def search_mask(snapshot: LeaderboardSnapshot, search: str) -> Optional[np.ndarray]:
+    """Rows matching a frontend-style search query, None if the query is empty"""
+    def build():
+        groups = [group.strip() for group in search.split(";") if group.strip()]
+        if not groups:
+            return None
+        result = np.zeros(snapshot.num_rows, dtype=bool)
+        for group in groups:
+            special_searches, text_search = parse_search_query(group)
+            mask = np.ones(snapshot.num_rows, dtype=bool)
+            for path, value in special_searches:
+                mask &= field_index(snapshot, path).contains(value)
+            if text_search:
+                index = field_index(snapshot, TEXT_SEARCH_FIELD)
+                mask &= index.regex(text_search) if looks_like_regex(text_search) else index.contains(text_search)
+            result |= mask
+        logger.info(LogFormatter.info(f"Search '{search}' matched {int(result.sum()):,} rows"))
+        return result
+    return snapshot.cached_query(("search", search), build)
@@ -7,6 +7,8 @@ import logging
 import aiohttp
 import asyncio
 import time
+import heapq
+import operator
 from huggingface_hub import HfApi, CommitOperationAdd
 from huggingface_hub.utils import build_hf_headers
 from datasets import disable_progress_bar
@@ -25,6 +27,9 @@ from app.services.hf_service import HuggingFaceService
 from app.utils.model_validation import ModelValidator
 from app.services.votes import VoteService
 from app.core.cache import cache_config
+from app.core.refresher import BackgroundRefresher
+from app.core.singleflight import SingleFlight
+from app.core.payload import SerializedPayload, serialize_json
 from app.utils.logging import LogFormatter
 
 # Disable datasets progress bars globally
@@ -126,6 +131,9 @@ class ModelService(HuggingFaceService):
             self.cached_models = None
             self.last_cache_update = 0
             self.cache_ttl = cache_config.cache_ttl.total_seconds()
+            self._models_refresher = BackgroundRefresher("models cache", self._refresh_models_cache, self.cache_ttl)
+            self._flights = SingleFlight()
+            self._models_payload: Optional[tuple] = None
             self._init_done = True
             logger.info(LogFormatter.success("Initialization complete"))
 
@@ -219,13 +227,15 @@ class ModelService(HuggingFaceService):
                 logger.info(LogFormatter.subsection("DATASET LOADING"))
                 logger.info(LogFormatter.info("Loading dataset files..."))
                 
-                # List files in repository
-                with suppress_output():
-                    files = self.hf_api.list_repo_files(
-                        repo_id=QUEUE_REPO,
-                        repo_type="dataset",
-                        token=self.token
-                    )
+                # List files in repository without blocking the event loop
+                def list_files():
+                    with suppress_output():
+                        return self.hf_api.list_repo_files(
+                            repo_id=QUEUE_REPO,
+                            repo_type="dataset",
+                            token=self.token
+                        )
+                files = await asyncio.to_thread(list_files)
                 
                 # Filter JSON files
                 json_files = [f for f in files if f.endswith('.json')]
@@ -283,6 +293,9 @@ class ModelService(HuggingFaceService):
                 logger.error(LogFormatter.error("Error processing files", e))
                 raise
             
+            # Serialize and compress the status response once per refresh
+            self._models_payload = (models, await asyncio.to_thread(self._serialize_models, models))
+
             # Update cache
             self.cached_models = models
             self.last_cache_update = time.time()
@@ -295,11 +308,16 @@ class ModelService(HuggingFaceService):
             raise
 
     async def initialize(self):
-        """Initialize the model service"""
+        """Initialize the model service, sharing the run in flight with concurrent callers"""
         if self._initialized:
             logger.info(LogFormatter.info("Service already initialized, using cached data"))
             return
-        
+        await self._flights.do("initialize", self._initialize)
+
+    async def _initialize(self):
+        if self._initialized:
+            return
+
         try:
             logger.info(LogFormatter.section("MODEL SERVICE INITIALIZATION"))
             
@@ -326,7 +344,7 @@ class ModelService(HuggingFaceService):
                     logger.info(line)
             
             # Load initial cache
-            await self._refresh_models_cache()
+            await self._models_refresher.refresh()
             
             self._initialized = True
             logger.info(LogFormatter.success("Model service initialization complete"))
@@ -341,19 +359,63 @@ class ModelService(HuggingFaceService):
             logger.info(LogFormatter.info("Service not initialized, initializing now..."))
             await self.initialize()
             
-        current_time = time.time()
-        cache_age = current_time - self.last_cache_update
-        
-        # Check if cache needs refresh
-        if not self.cached_models:
-            logger.info(LogFormatter.info("No cached data available, refreshing cache..."))
-            return await self._refresh_models_cache()
-        elif cache_age > self.cache_ttl:
-            logger.info(LogFormatter.info(f"Cache expired ({cache_age:.1f}s old, TTL: {self.cache_ttl}s)"))
-            return await self._refresh_models_cache()
-        else:
-            logger.info(LogFormatter.info(f"Using cached data ({cache_age:.1f}s old)"))
-            return self.cached_models
+        # Expired data keeps being served while the refresh runs in the background
+        models = await self._models_refresher.get()
+        logger.info(LogFormatter.info(f"Using cached data ({self._models_refresher.age:.1f}s old)"))
+        return models
+
+    async def get_pending_models(
+        self,
+        with_votes: bool = False,
+        user_id: Optional[str] = None,
+        sort_by_votes: bool = False,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Models waiting for evaluation, optionally with their votes
+
+        With votes, each model gets its vote count, its votes per revision
+        and, when a user is given, whether that user voted for it. Sorting by
+        votes keeps the `limit` most voted models without sorting them all.
+        """
+        models = await self.get_models()
+        pending = models.get("pending", [])
+        if not (with_votes or user_id or sort_by_votes):
+            return pending[:limit] if limit else pending
+
+        await self.vote_service.initialize()
+        counts = await self.vote_service.get_vote_counts([model["name"] for model in pending], user_id)
+        pending = [
+            {
+                **model,
+                "votes": counts[model["name"]]["total_votes"],
+                "votes_by_revision": counts[model["name"]]["votes_by_revision"],
+                **({"has_voted": counts[model["name"]]["has_voted"]} if user_id else {}),
+            }
+            for model in pending
+        ]
+        if sort_by_votes:
+            by_votes = operator.itemgetter("votes")
+            if limit:
+                return heapq.nlargest(limit, pending, key=by_votes)
+            return sorted(pending, key=by_votes, reverse=True)
+        return pending[:limit] if limit else pending
+
+    def _serialize_models(self, models: Dict[str, List[Dict[str, Any]]]) -> SerializedPayload:
+        """Serialize and precompress models grouped by status (blocking)"""
+        return serialize_json(models).precompress()
+
+    async def get_models_payload(self) -> SerializedPayload:
+        """Serialized models grouped by status, built once per cache refresh"""
+        models = await self.get_models()
+        cached = self._models_payload
+        if cached is not None and cached[0] is models:
+            return cached[1]
+        payload = await self._flights.do(
+            ("payload", id(models)),
+            lambda: asyncio.to_thread(self._serialize_models, models)
+        )
+        self._models_payload = (models, payload)
+        return payload
 
     async def submit_model(
         self, 
@@ -0,0 +1,424 @@
+"""
+Column-oriented snapshot of the leaderboard contents dataset.
+"""
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from app.core.payload import SerializedPayload, dump_json, serialize_json, serialize_table
+from app.utils.logging import LogFormatter
+
+logger = logging.getLogger(__name__)
+
+# Benchmark tasks as (key in the formatted output, dataset column / display name)
+EVALUATION_TASKS = [
+    ("multifin", "MultiFin"),
+    ("qa", "QA"),
+    ("fns", "FNS"),
+    ("finnum", "FinNum"),
+    ("fintext", "FinText"),
+]
+
+# Formatted output path -> (dataset column, default used when the column is absent).
+# Entries without a column are constants; `id` and `model.type` are derived below.
+FORMATTED_FIELDS: Dict[str, Tuple[Optional[str], Any]] = {
+    "id": (None, None),
+    "model.name": ("fullname", None),
+    "model.sha": ("Model sha", None),
+    "model.precision": ("Precision", None),
+    "model.type": ("Type", ""),
+    "model.weight_type": ("Weight type", None),
+    "model.architecture": ("Architecture", None),
+    "model.average_score": ("Average ⬆️", None),
+    "model.has_chat_template": ("Chat Template", False),
+    **{
+        path: source
+        for key, name in EVALUATION_TASKS
+        for path, source in (
+            (f"evaluations.{key}.name", (None, name)),
+            (f"evaluations.{key}.value", (f"{name} Raw", 0)),
+            (f"evaluations.{key}.normalized_score", (name, 0)),
+        )
+    },
+    "features.is_not_available_on_hub": ("Available on the hub", False),
+    "features.is_merged": ("Merged", False),
+    "features.is_moe": ("MoE", False),
+    "features.is_flagged": ("Flagged", False),
+    "features.is_highlighted_by_maintainer": ("Official Providers", False),
+    "metadata.upload_date": ("Upload To Hub Date", None),
+    "metadata.submission_date": ("Submission Date", None),
+    "metadata.generation": ("Generation", None),
+    "metadata.base_model": ("Base Model", None),
+    "metadata.hub_license": ("Hub License", None),
+    "metadata.hub_hearts": ("Hub ❤️", None),
+    "metadata.params_billions": ("#Params (B)", None),
+    "metadata.co2_cost": ("CO₂ cost (kg)", 0),
+}
+
+# Ranked task -> formatted column holding its score. Each row gets
+# `rankings.<task>.rank` (dense, 1 = best) and `rankings.<task>.percentile`
+RANKING_TASKS: Dict[str, str] = {
+    "average": "model.average_score",
+    **{key: f"evaluations.{key}.normalized_score" for key, _ in EVALUATION_TASKS},
+}
+
+# Maximum number of query results kept per snapshot
+QUERY_CACHE_SIZE = 256
+
+# Map old model types to new ones
+MODEL_TYPE_MAPPING = {
+    "fine-tuned": "fined-tuned-on-domain-specific-dataset",
+    "fine tuned": "fined-tuned-on-domain-specific-dataset",
+    "finetuned": "fined-tuned-on-domain-specific-dataset",
+    "fine_tuned": "fined-tuned-on-domain-specific-dataset",
+    "ft": "fined-tuned-on-domain-specific-dataset",
+    "finetuning": "fined-tuned-on-domain-specific-dataset",
+    "fine tuning": "fined-tuned-on-domain-specific-dataset",
+    "fine-tuning": "fined-tuned-on-domain-specific-dataset"
+}
+
+# Bump when the formatting rules change, so formatted columns stored by
+# earlier code are rebuilt
+FORMATTER_REVISION = 2
+# Also follows the field, ranking and type tables, so editing them is enough
+FORMATTER_VERSION = f"{FORMATTER_REVISION}-" + hashlib.blake2b(
+    repr((FORMATTED_FIELDS, RANKING_TASKS, MODEL_TYPE_MAPPING)).encode(), digest_size=4
+).hexdigest()
+
+
+def normalize_model_type(original_type: Optional[str]) -> str:
+    """Clean a raw model type by removing emojis and mapping legacy names"""
+    model_type = (original_type or "").lower().strip()
+
+    # Remove emojis and parentheses
+    if "(" in model_type:
+        model_type = model_type.split("(")[0].strip()
+    model_type = ''.join(c for c in model_type if not c in '🔶🟢🟩💬🤝🌸 ')
+
+    mapped_type = MODEL_TYPE_MAPPING.get(model_type.lower().strip(), model_type)
+    if mapped_type != model_type:
+        logger.debug(LogFormatter.info(f"Model type mapped: {original_type} -> {mapped_type}"))
+    return mapped_type
+
+
+def _nan_to_null(table: pa.Table) -> pa.Table:
+    """Replace NaN values in floating point columns with nulls"""
+    for i, field in enumerate(table.schema):
+        if not pa.types.is_floating(field.type):
+            continue
+        column = table.column(i)
+        is_nan = pc.is_nan(column)
+        if pc.any(is_nan).as_py():
+            table = table.set_column(i, field, pc.if_else(is_nan, pa.scalar(None, field.type), column))
+    return table
+
+
+def rank_scores(column: pa.ChunkedArray) -> Tuple[pa.ChunkedArray, pa.ChunkedArray]:
+    """Dense rank (1 = best) and percentile of every score, null where missing
+
+    The percentile is the share of the other scored models scoring at most as
+    high, so the best model, and every model tied with it, is at 100.
+    """
+    scores = pc.cast(column, pa.float64()).to_numpy(zero_copy_only=False)
+    scored = ~np.isnan(scores)
+    valid = np.sort(scores[scored])
+    distinct = np.unique(valid)
+
+    ranks = np.zeros(len(scores), dtype=np.int64)
+    ranks[scored] = len(distinct) - np.searchsorted(distinct, scores[scored])
+    percentiles = np.full(len(scores), np.nan)
+    # Models scoring at most as high, not counting the model itself
+    at_most = np.searchsorted(valid, scores[scored], side="right") - 1
+    percentiles[scored] = np.round(100.0 * at_most / (len(valid) - 1), 2) if len(valid) > 1 else 100.0
+    return (
+        pa.chunked_array([pa.array(ranks, pa.int64(), mask=~scored)]),
+        pa.chunked_array([pa.array(percentiles, pa.float64(), mask=~scored)]),
+    )
+
+
+def _nest(paths: List[str], columns: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Assemble row dicts from flat dotted-path columns, one tree level at a time"""
+    tree: Dict[str, Any] = {}
+    for path in paths:
+        node = tree
+        *parents, leaf = path.split(".")
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = path
+
+    def build(node) -> List[Any]:
+        if isinstance(node, str):
+            return columns[node].to_pylist()
+        keys = list(node)
+        values = [build(child) for child in node.values()]
+        return [dict(zip(keys, row)) for row in zip(*values)]
+
+    return build(tree)
+
+
+class LeaderboardSnapshot:
+    """Immutable, column-oriented view over one load of the contents dataset"""
+
+    def __init__(
+        self,
+        table: pa.Table,
+        version: Optional[str] = None,
+        formatted_columns: Optional[Dict[str, pa.ChunkedArray]] = None,
+        row_hashes: Optional[pa.Table] = None,
+        payloads: Optional[Dict[Tuple[str, str], SerializedPayload]] = None
+    ):
+        self.table = _nan_to_null(table)
+        self.num_rows = self.table.num_rows
+        self.created_at = time.time()
+        self.checked_at = self.created_at
+        self.version = version or f"{int(self.created_at * 1000):x}"
+        # Prebuilt columns, row hashes and payloads, e.g. memory-mapped from the history store
+        self._formatted_columns = formatted_columns
+        self._payloads: Dict[Tuple[str, str], SerializedPayload] = dict(payloads or {})
+        self._indexes: Dict[Tuple[str, Any], Any] = {}
+        if row_hashes is not None:
+            self._indexes[("rows", "hashes")] = row_hashes
+        self._query_cache: "OrderedDict[Any, Any]" = OrderedDict()
+        # Payloads may be built in worker threads while requests read the cache
+        self._query_lock = threading.Lock()
+
+    @property
+    def age(self) -> float:
+        """Seconds since the snapshot was last confirmed to match the dataset"""
+        return time.time() - self.checked_at
+
+    def mark_checked(self):
+        """Record that the dataset has not changed since this snapshot was built"""
+        self.checked_at = time.time()
+
+    def column(self, name: str, default: Any = None) -> pa.ChunkedArray:
+        """Get a dataset column, or a column filled with `default` if it is absent"""
+        if name in self.table.column_names:
+            return self.table.column(name)
+        return self._constant(default)
+
+    def _constant(self, value: Any) -> pa.ChunkedArray:
+        """A column repeating the same value for every row"""
+        if value is None:
+            return pa.chunked_array([pa.nulls(self.num_rows)])
+        return pa.chunked_array([pa.repeat(value, self.num_rows)])
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Raw dataset rows as dicts"""
+        return self.table.to_pylist()
+
+    @property
+    def formatted_columns(self) -> Dict[str, pa.ChunkedArray]:
+        """Formatted leaderboard as flat columns keyed by dotted output path"""
+        if self._formatted_columns is None:
+            self._formatted_columns = self._build_formatted_columns()
+        return self._formatted_columns
+
+    def field_paths(self, fields: Sequence[str]) -> List[str]:
+        """Formatted columns selected by dotted field paths, a path selects its whole subtree"""
+        def selects(field: str, path: str) -> bool:
+            return path == field or path.startswith(f"{field}.")
+
+        unknown = [field for field in fields if not any(selects(field, path) for path in self.formatted_columns)]
+        if unknown:
+            raise ValueError(f"Unknown field: {', '.join(unknown)}")
+        return [path for path in self.formatted_columns if any(selects(field, path) for field in fields)]
+
+    def formatted(self, indices: Optional[np.ndarray] = None, fields: Sequence[str] = ()) -> List[Dict[str, Any]]:
+        """Formatted leaderboard rows in the structure expected by the frontend
+
+        If `indices` is given, only those rows are built, in that order. If
+        `fields` is given, rows only contain those dotted paths.
+        """
+        columns = self.formatted_columns
+        if fields:
+            columns = {path: columns[path] for path in self.field_paths(fields)}
+        if indices is not None:
+            positions = pa.array(indices, pa.int64())
+            columns = {path: column.take(positions) for path, column in columns.items()}
+        return _nest(list(columns), columns)
+
+    def formatted_column(self, path: str) -> pa.ChunkedArray:
+        """A single formatted column by dotted path"""
+        if path not in self.formatted_columns:
+            raise ValueError(f"Unknown field: {path}")
+        return self.formatted_columns[path]
+
+    def memoize(self, kind: str, key: Any, build: Callable[[], Any]) -> Any:
+        """Build a per-snapshot index on first use"""
+        if (kind, key) not in self._indexes:
+            self._indexes[(kind, key)] = build()
+        return self._indexes[(kind, key)]
+
+    def numeric(self, path: str) -> np.ndarray:
+        """Column as float64 values, NaN where missing"""
+        def build():
+            column = pc.cast(self.formatted_column(path), pa.float64())
+            return column.to_numpy(zero_copy_only=False)
+        return self.memoize("numeric", path, build)
+
+    def flag(self, path: str) -> np.ndarray:
+        """Boolean column as a mask, missing values count as False"""
+        def build():
+            column = pc.fill_null(pc.cast(self.formatted_column(path), pa.bool_()), False)
+            return column.to_numpy(zero_copy_only=False).astype(bool)
+        return self.memoize("flag", path, build)
+
+    def value_masks(self, path: str) -> Dict[Any, np.ndarray]:
+        """One row mask per distinct non-null value of a categorical column"""
+        def build():
+            encoded = self.formatted_column(path).combine_chunks().dictionary_encode()
+            codes = pc.fill_null(encoded.indices, -1).to_numpy(zero_copy_only=False)
+            return {
+                value: codes == code
+                for code, value in enumerate(encoded.dictionary.to_pylist())
+            }
+        return self.memoize("values", path, build)
+
+    def range_mask(self, path: str, low: Optional[float], high: Optional[float]) -> np.ndarray:
+        """Rows whose value lies in [low, high), using a presorted copy of the column"""
+        def build():
+            values = self.numeric(path)
+            order = np.argsort(values, kind="stable")
+            return order, values[order]
+        order, sorted_values = self.memoize("range", path, build)
+        start = 0 if low is None else np.searchsorted(sorted_values, low, side="left")
+        # NaN sorts last, so missing values are never part of a range
+        stop = (
+            np.searchsorted(sorted_values, np.inf, side="right") if high is None
+            else np.searchsorted(sorted_values, high, side="left")
+        )
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+
+    def sort_order(self, keys: Sequence[Tuple[str, bool]]) -> np.ndarray:
+        """Row order for (path, descending) sort keys, missing values last"""
+        keys = tuple(keys)
+        def build():
+            table = pa.table({
+                f"key_{i}": self.formatted_column(path) for i, (path, _) in enumerate(keys)
+            })
+            sort_keys = [
+                (f"key_{i}", "descending" if descending else "ascending")
+                for i, (_, descending) in enumerate(keys)
+            ]
+            return pc.sort_indices(table, sort_keys=sort_keys).to_numpy()
+        return self.memoize("sort", keys, build)
+
+    def cached_query(self, key: Any, build: Callable[[], Any]) -> Any:
+        """Memoize a query result on this snapshot, keeping the most recent ones"""
+        with self._query_lock:
+            if key in self._query_cache:
+                self._query_cache.move_to_end(key)
+                return self._query_cache[key]
+        result = build()
+        with self._query_lock:
+            self._query_cache[key] = result
+            if len(self._query_cache) > QUERY_CACHE_SIZE:
+                self._query_cache.popitem(last=False)
+        return result
+
+    def formatted_table(self, indices: Optional[np.ndarray] = None, fields: Sequence[str] = ()) -> pa.Table:
+        """Formatted leaderboard as a flat table with dotted column names"""
+        table = self.memoize("table", "formatted", lambda: pa.table(self.formatted_columns))
+        if fields:
+            table = table.select(self.field_paths(fields))
+        return table if indices is None else table.take(pa.array(indices, pa.int64()))
+
+    def has_payload(self, kind: str, wire_format: str = "json", fields: Tuple[str, ...] = ()) -> bool:
+        if fields:
+            return ("projection", fields, wire_format) in self._query_cache
+        return (kind, wire_format) in self._payloads
+
+    def payload(self, kind: str, wire_format: str = "json", fields: Tuple[str, ...] = ()) -> SerializedPayload:
+        """Serialized `raw` or `formatted` leaderboard, built once per snapshot and format
+
+        Projections on `fields` of the formatted leaderboard are kept with the
+        recent query results.
+        """
+        if kind not in ("raw", "formatted"):
+            raise ValueError(f"Unknown payload kind: {kind}")
+        if fields:
+            if kind != "formatted":
+                raise ValueError("Field projection is only available for the formatted leaderboard")
+            return self.cached_query(
+                ("projection", fields, wire_format),
+                lambda: self._serialize(kind, wire_format, fields)
+            )
+        key = (kind, wire_format)
+        if key not in self._payloads:
+            self._payloads[key] = self._serialize(kind, wire_format)
+        return self._payloads[key]
+
+    def _serialize(self, kind: str, wire_format: str, fields: Tuple[str, ...] = ()) -> SerializedPayload:
+        if wire_format == "json":
+            payload = serialize_json(self.to_records() if kind == "raw" else self.formatted(fields=fields))
+        else:
+            payload = serialize_table(self.table if kind == "raw" else self.formatted_table(fields=fields), wire_format)
+        projection = f" ({', '.join(fields)})" if fields else ""
+        logger.info(LogFormatter.success(
+            f"Serialized {kind} leaderboard{projection} as {wire_format}: {len(payload) / 1024:.1f}KB, ETag {payload.etag}"
+        ))
+        return payload
+
+    def row_hashes(self) -> pa.Table:
+        """Row ids and the content hash of every formatted row, in row order
+
+        Rankings are left out: they are derived from the other rows, so one
+        new model would otherwise change the hash of most rows.
+        """
+        def build():
+            paths = [path for path in self.formatted_columns if not path.startswith("rankings.")]
+            rows = self.formatted(fields=paths)
+            return pa.table({
+                "id": pa.array([row["id"] for row in rows], pa.string()),
+                "hash": pa.array([hashlib.blake2b(dump_json(row), digest_size=16).digest() for row in rows], pa.binary(16)),
+            })
+        return self.memoize("rows", "hashes", build)
+
+    def row_positions(self) -> Dict[str, int]:
+        """Position of every row id in the snapshot"""
+        def build():
+            return {row_id: position for position, row_id in enumerate(self.formatted_column("id").to_pylist())}
+        return self.memoize("rows", "positions", build)
+
+    def _build_formatted_columns(self) -> Dict[str, pa.ChunkedArray]:
+        columns = {}
+        for path, (source, default) in FORMATTED_FIELDS.items():
+            columns[path] = self.column(source, default) if source else self._constant(default)
+
+        columns["model.type"] = self._normalize_types(columns["model.type"])
+        columns["id"] = self._build_ids()
+        for task, path in RANKING_TASKS.items():
+            columns[f"rankings.{task}.rank"], columns[f"rankings.{task}.percentile"] = rank_scores(columns[path])
+        return columns
+
+    def _normalize_types(self, types: pa.ChunkedArray) -> pa.ChunkedArray:
+        """Normalize model types once per distinct value, then broadcast back to rows"""
+        encoded = pc.cast(types, pa.string()).combine_chunks().dictionary_encode()
+        distinct = [normalize_model_type(value) for value in encoded.dictionary.to_pylist()]
+        if pc.any(pc.is_null(encoded.indices)).as_py():
+            # Missing types are treated as empty strings
+            distinct.append(normalize_model_type(""))
+            indices = pc.fill_null(encoded.indices, len(distinct) - 1)
+        else:
+            indices = encoded.indices
+        return pa.chunked_array([pa.array(distinct, pa.string()).take(indices)])
+
+    def _build_ids(self) -> pa.ChunkedArray:
+        """Unique ID combining model name, precision, sha and chat template status"""
+        names = self.column("fullname", "Unknown").to_pylist()
+        precisions = self.column("Precision", "Unknown").to_pylist()
+        shas = self.column("Model sha", "Unknown").to_pylist()
+        chat_templates = self.column("Chat Template", False).to_pylist()
+        ids = [
+            f"{name}_{precision}_{sha}_{str(chat_template)}"
+            for name, precision, sha, chat_template in zip(names, precisions, shas, chat_templates)
+        ]
+        return pa.chunked_array([pa.array(ids, pa.string())])
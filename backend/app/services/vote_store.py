@@ -0,0 +1,196 @@
+"""
+Compact in-memory store of votes: one row per vote in typed arrays, with
+model, revision, user and vote type strings interned as integer ids.
+"""
+import time
+import calendar
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Timestamps are stored as seconds since the epoch and written back in this format
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# Bits of each id in a packed (model, revision, user) key
+_KEY_BITS = 32
+
+def parse_timestamp(timestamp: str) -> int:
+    """Seconds since the epoch of a canonical `YYYY-MM-DDTHH:MM:SSZ` timestamp"""
+    return calendar.timegm((
+        int(timestamp[0:4]), int(timestamp[5:7]), int(timestamp[8:10]),
+        int(timestamp[11:13]), int(timestamp[14:16]), int(timestamp[17:19]),
+    ))
+
+def format_timestamp(seconds: int) -> str:
+    return time.strftime(TIMESTAMP_FORMAT, time.gmtime(seconds))
+
+class Interner:
+    """Maps each distinct string to a small integer id, and back"""
+
+    def __init__(self):
+        self.ids: Dict[Any, int] = {}
+        self.values: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def get(self, value: Any) -> Optional[int]:
+        return self.ids.get(value)
+
+    def intern(self, value: Any) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+class VoteStore:
+    """Votes as parallel arrays, indexed by model and by user
+
+    Row `i` of the arrays is the i-th vote added. The model and user indexes
+    hold row numbers, in the order votes were added, and a user's vote on a
+    model revision is deduplicated through a packed integer key. Vote dicts
+    are only rebuilt for the rows being returned.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.models = Interner()
+        self.revisions = Interner()
+        self.users = Interner()
+        self.vote_types = Interner()
+        # One entry per vote
+        self.model_ids = array("I")
+        self.revision_ids = array("I")
+        self.user_ids = array("I")
+        self.vote_type_ids = array("I")
+        self.timestamps = array("q")
+        # One entry per model, or per user, indexed by its id
+        self.rows_by_model: List[array] = []
+        self.rows_by_user: List[array] = []
+        self.model_up_votes = array("I")
+        self.model_down_votes = array("I")
+        self.user_up_votes = array("I")
+        self.user_down_votes = array("I")
+        # Revision id -> number of votes, in the order revisions were first voted for
+        self.model_revision_votes: List[Dict[int, int]] = []
+        self.keys: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @staticmethod
+    def _pack(model_id: int, revision_id: int, user_id: int) -> int:
+        return (((model_id << _KEY_BITS) | revision_id) << _KEY_BITS) | user_id
+
+    def has_vote(self, model: str, revision: str, username: str) -> bool:
+        """Whether the user already voted for this model revision"""
+        model_id = self.models.get(model)
+        revision_id = self.revisions.get(revision)
+        user_id = self.users.get(username)
+        if model_id is None or revision_id is None or user_id is None:
+            return False
+        return self._pack(model_id, revision_id, user_id) in self.keys
+
+    def add(self, vote: Dict[str, Any]) -> bool:
+        """Add a vote, False if the user already voted for this model revision
+
+        A malformed vote raises before anything is changed, so the arrays
+        always stay the same length.
+        """
+        model, revision, username = vote["model"], vote["revision"], vote["username"]
+        timestamp = parse_timestamp(vote["timestamp"])
+        if self.has_vote(model, revision, username):
+            return False
+
+        # Vote types come from the votes file as they are: intern the type
+        # first, it is the one value has_vote did not check is hashable
+        vote_type_id = self.vote_types.intern(vote.get("vote_type"))
+        model_id = self.models.intern(model)
+        revision_id = self.revisions.intern(revision)
+        user_id = self.users.intern(username)
+        if model_id == len(self.rows_by_model):
+            self.rows_by_model.append(array("I"))
+            self.model_up_votes.append(0)
+            self.model_down_votes.append(0)
+            self.model_revision_votes.append({})
+        if user_id == len(self.rows_by_user):
+            self.rows_by_user.append(array("I"))
+            self.user_up_votes.append(0)
+            self.user_down_votes.append(0)
+
+        row = len(self.timestamps)
+        self.model_ids.append(model_id)
+        self.revision_ids.append(revision_id)
+        self.user_ids.append(user_id)
+        self.vote_type_ids.append(vote_type_id)
+        self.timestamps.append(timestamp)
+        self.rows_by_model[model_id].append(row)
+        self.rows_by_user[user_id].append(row)
+        self.keys.add(self._pack(model_id, revision_id, user_id))
+
+        if vote.get("vote_type") == "up":
+            self.model_up_votes[model_id] += 1
+            self.user_up_votes[user_id] += 1
+        elif vote.get("vote_type") == "down":
+            self.model_down_votes[model_id] += 1
+            self.user_down_votes[user_id] += 1
+        revision_votes = self.model_revision_votes[model_id]
+        revision_votes[revision_id] = revision_votes.get(revision_id, 0) + 1
+        return True
+
+    def vote(self, row: int) -> Dict[str, Any]:
+        """The vote stored in a row, as it was added"""
+        vote = {
+            "model": self.models.values[self.model_ids[row]],
+            "revision": self.revisions.values[self.revision_ids[row]],
+            "username": self.users.values[self.user_ids[row]],
+            "timestamp": format_timestamp(self.timestamps[row]),
+        }
+        vote_type = self.vote_types.values[self.vote_type_ids[row]]
+        if vote_type is not None:
+            vote["vote_type"] = vote_type
+        return vote
+
+    def votes(self, rows: Iterable[int]) -> List[Dict[str, Any]]:
+        return [self.vote(row) for row in rows]
+
+    def model_rows(self, model: str) -> array:
+        """Rows of a model's votes, oldest first"""
+        model_id = self.models.get(model)
+        return self.rows_by_model[model_id] if model_id is not None else array("I")
+
+    def user_rows(self, username: str) -> array:
+        """Rows of a user's votes, oldest first"""
+        user_id = self.users.get(username)
+        return self.rows_by_user[user_id] if user_id is not None else array("I")
+
+    def model_counts(self, model: str) -> Dict[str, Any]:
+        """Vote totals of a model, per type and per revision"""
+        model_id = self.models.get(model)
+        if model_id is None:
+            return {"total_votes": 0, "up_votes": 0, "down_votes": 0, "votes_by_revision": {}}
+        return {
+            "total_votes": len(self.rows_by_model[model_id]),
+            "up_votes": self.model_up_votes[model_id],
+            "down_votes": self.model_down_votes[model_id],
+            "votes_by_revision": {
+                self.revisions.values[revision_id]: count
+                for revision_id, count in self.model_revision_votes[model_id].items()
+            },
+        }
+
+    def user_counts(self, username: str) -> Dict[str, int]:
+        """Vote totals of a user, per type"""
+        user_id = self.users.get(username)
+        if user_id is None:
+            return {"total_votes": 0, "up_votes": 0, "down_votes": 0}
+        return {
+            "total_votes": len(self.rows_by_user[user_id]),
+            "up_votes": self.user_up_votes[user_id],
+            "down_votes": self.user_down_votes[user_id],
+        }
+
+    def user_models(self, username: str) -> Set[str]:
+        """Models the user voted for"""
+        return {self.models.values[self.model_ids[row]] for row in self.user_rows(username)}
@@ -1,22 +1,71 @@
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Set, Tuple, Optional
+from typing import Dict, Any, List, Sequence, Tuple, Optional
 import json
+import base64
+import random
+import hashlib
 import logging
 import asyncio
 from pathlib import Path
 import os
 import aiohttp
-from huggingface_hub import HfApi
-import datasets
+from huggingface_hub import CommitOperationAdd, HfApi, get_hf_file_metadata, hf_hub_url
+from huggingface_hub.utils import EntryNotFoundError
+from huggingface_hub.file_download import HfFileMetadata
 
 from app.services.hf_service import HuggingFaceService
+from app.services.vote_store import VoteStore
 from app.config import HF_TOKEN, API
-from app.config.hf_config import HF_ORGANIZATION
+from app.config.hf_config import HF_ORGANIZATION, VOTES_REPO
 from app.core.cache import cache_config
+from app.core.singleflight import SingleFlight
 from app.utils.logging import LogFormatter
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
 logger = logging.getLogger(__name__)
 
+VOTES_FILENAME = "votes_data.jsonl"
+# Bytes at the start of the votes file compared to detect a rewrite
+VOTES_HEADER_SIZE = 4096
+# Bytes before the local end fetched again on sync, to check the local file is a prefix of the remote one
+VOTES_OVERLAP_SIZE = 4096
+# Background syncs are spread by up to this fraction of the sync interval
+SYNC_JITTER = 0.1
+# Longest wait between background syncs after repeated failures, in seconds
+SYNC_MAX_BACKOFF = 3600
+# Queued votes are committed to the hub at least this often, in seconds
+UPLOAD_FLUSH_INTERVAL = 60
+# Longest wait between upload attempts after repeated failures, in seconds
+UPLOAD_MAX_BACKOFF = 900
+# Vote types accepted from users
+VOTE_TYPES = ("up", "down")
+# Votes listed per page when no limit is given
+DEFAULT_VOTES_PAGE_SIZE = 100
+
+def _vote_key(vote: Dict[str, Any]) -> Tuple[str, str, str]:
+    """A user votes once per model revision"""
+    return (vote["model"], vote["revision"], vote["username"])
+
+def _lock_outbox_file(outbox: Path):
+    """Open and lock the lock file of an outbox, None if a running process holds it
+
+    The lock is released when the returned file is closed or the process
+    exits. Without fcntl there is a single process and every lock is free.
+    """
+    lock_file = open(outbox.with_suffix(".lock"), "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
 class VoteService(HuggingFaceService):
     _instance: Optional['VoteService'] = None
     _initialized = False
@@ -30,64 +79,125 @@ class VoteService(HuggingFaceService):
         if not hasattr(self, '_init_done'):
             super().__init__()
             self.votes_file = cache_config.votes_file
+            # Votes cast here and not yet committed to the hub, also kept on disk. Each
+            # worker process has its own outbox, locked for as long as it runs
+            outbox = cache_config.votes_outbox_file
+            self.outbox_file = outbox.with_name(f"{outbox.stem}.{os.getpid()}{outbox.suffix}")
+            self._outbox_lock_file = None
             self.votes_to_upload: List[Dict[str, Any]] = []
-            self.vote_check_set: Set[Tuple[str, str, str]] = set()
-            self._votes_by_model: Dict[str, List[Dict[str, Any]]] = {}
-            self._votes_by_user: Dict[str, List[Dict[str, Any]]] = {}
+            # Loaded votes, indexed by model and user, with totals kept up to date as votes are added
+            self._store = VoteStore()
+            # Bumped when all votes are reloaded, which invalidates pagination cursors
+            self._votes_generation = 0
             self._upload_lock = asyncio.Lock()
+            # Held while the local votes file is synced with or committed to the hub
+            self._sync_lock = asyncio.Lock()
+            self._load_lock = asyncio.Lock()
+            # Position in the votes file up to which votes are loaded
+            self._votes_offset = 0
+            self._votes_inode = None
+            self._votes_header = b""
+            self._votes_header_hash = None
             self._last_sync = None
+            # ETag and commit of the remote votes file as of the last sync
+            self._remote_votes_etag = None
+            self._remote_votes_revision = None
             self._sync_interval = 300  # 5 minutes
+            self._sync_task: Optional[asyncio.Task] = None
+            self._sync_failures = 0
+            self._outbox_lock = asyncio.Lock()
+            self._upload_task: Optional[asyncio.Task] = None
+            self._upload_requested = asyncio.Event()
+            self._upload_failures = 0
             self._total_votes = 0
             self._last_vote_timestamp = None
             self._max_retries = 3
             self._retry_delay = 1  # seconds
             self._upload_batch_size = 10
             self.hf_api = HfApi(token=HF_TOKEN)
+            self._flights = SingleFlight()
             self._init_done = True
 
     async def initialize(self):
-        """Initialize the vote service"""
+        """Initialize the vote service, sharing the run in flight with concurrent callers
+
+        Once initialized this returns immediately: new votes on the hub are
+        picked up by the background sync, never on the request path.
+        """
         if self._initialized:
-            await self._check_for_new_votes()
             return
-        
+        await self._flights.do("initialize", self._initialize)
+
+    def start_background_sync(self):
+        """Sync votes with the hub every sync interval in the background"""
+        if self._sync_task is None or self._sync_task.done():
+            logger.info(LogFormatter.info(f"Syncing votes with the hub every {self._sync_interval}s"))
+            self._sync_task = asyncio.create_task(self._sync_periodically())
+
+    async def stop_background_sync(self):
+        """Cancel the background sync"""
+        if self._sync_task is not None and not self._sync_task.done():
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._sync_task = None
+
+    def _next_sync_delay(self) -> float:
+        """Sync interval, doubled for every consecutive failure, with jitter
+
+        The jitter keeps workers and replicas from hitting the hub in step.
+        """
+        delay = min(self._sync_interval * 2 ** self._sync_failures, max(SYNC_MAX_BACKOFF, self._sync_interval))
+        return delay * random.uniform(1 - SYNC_JITTER, 1 + SYNC_JITTER)
+
+    async def _sync_periodically(self):
+        while True:
+            try:
+                if not self._initialized:
+                    await self.initialize()
+                else:
+                    await self._flights.do("sync", self._sync_with_hub)
+                self._sync_failures = 0
+            except Exception:
+                # Already logged, keep serving the votes in memory
+                self._sync_failures += 1
+            delay = self._next_sync_delay()
+            if self._sync_failures:
+                logger.warning(LogFormatter.warning(
+                    f"Vote sync failed {self._sync_failures} time(s) in a row, retrying in {delay:.0f}s"
+                ))
+            await asyncio.sleep(delay)
+
+    async def _initialize(self):
+        if self._initialized:
+            return
+
         try:
             logger.info(LogFormatter.section("VOTE SERVICE INITIALIZATION"))
             
             # Ensure votes directory exists
             self.votes_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Load existing votes if file exists
-            local_vote_count = 0
-            if self.votes_file.exists():
-                logger.info(LogFormatter.info(f"Loading votes from {self.votes_file}"))
-                local_vote_count = await self._count_local_votes()
-                logger.info(LogFormatter.info(f"Found {local_vote_count:,} local votes"))
-            
-            # Check remote votes count
-            remote_vote_count = await self._count_remote_votes()
-            logger.info(LogFormatter.info(f"Found {remote_vote_count:,} remote votes"))
-            
-            if remote_vote_count > local_vote_count:
-                logger.info(LogFormatter.info(f"Fetching {remote_vote_count - local_vote_count:,} new votes"))
+            # Fetch the votes cast since the local copy was last synced
+            try:
                 await self._sync_with_hub()
-            elif remote_vote_count < local_vote_count:
-                logger.warning(LogFormatter.warning(f"Local votes ({local_vote_count:,}) > Remote votes ({remote_vote_count:,})"))
+            except Exception as e:
+                logger.warning(LogFormatter.warning(f"Could not sync votes with the hub, using local votes: {e}"))
+            
+            if self.votes_file.exists():
                 await self._load_existing_votes()
             else:
-                logger.info(LogFormatter.success("Local and remote votes are in sync"))
-                if local_vote_count > 0:
-                    await self._load_existing_votes()
-                else:
-                    logger.info(LogFormatter.info("No votes found"))
+                logger.info(LogFormatter.info("No votes found"))
+            await self._load_outbox()
             
             self._initialized = True
-            self._last_sync = datetime.now(timezone.utc)
             
             # Final summary
             stats = {
                 "Total_Votes": self._total_votes,
-                "Last_Sync": self._last_sync.strftime("%Y-%m-%d %H:%M:%S UTC")
+                "Last_Sync": self._last_sync.strftime("%Y-%m-%d %H:%M:%S UTC") if self._last_sync else "Never"
             }
             logger.info(LogFormatter.section("INITIALIZATION COMPLETE"))
             for line in LogFormatter.stats(stats):
@@ -97,217 +207,491 @@ class VoteService(HuggingFaceService):
             logger.error(LogFormatter.error("Initialization failed", e))
             raise
 
-    async def _count_local_votes(self) -> int:
-        """Count votes in local file"""
-        if not self.votes_file.exists():
-            return 0
-            
-        count = 0
-        try:
-            with open(self.votes_file, 'r') as f:
-                for _ in f:
-                    count += 1
-            return count
-        except Exception as e:
-            logger.error(f"Error counting local votes: {str(e)}")
-            return 0
+    async def _remote_votes_metadata(self) -> HfFileMetadata:
+        """Size, ETag and commit of the votes file on the hub (a HEAD request)"""
+        url = hf_hub_url(VOTES_REPO, VOTES_FILENAME, repo_type="dataset")
+        return await asyncio.to_thread(get_hf_file_metadata, url, token=HF_TOKEN)
 
-    async def _count_remote_votes(self) -> int:
-        """Count votes in remote file"""
-        url = f"https://huggingface.co/datasets/{HF_ORGANIZATION}/votes/raw/main/votes_data.jsonl"
+    async def _fetch_remote_votes(self, metadata: HfFileMetadata, start: int = 0) -> bytes:
+        """Bytes of the remote votes file from `start` on, at the commit described by `metadata`"""
+        url = hf_hub_url(VOTES_REPO, VOTES_FILENAME, repo_type="dataset", revision=metadata.commit_hash)
         headers = {"Authorization": f"Bearer {HF_TOKEN}"} if HF_TOKEN else {}
-        
+        if metadata.location != hf_hub_url(VOTES_REPO, VOTES_FILENAME, repo_type="dataset"):
+            # LFS file: signed, content-addressed URL that takes no token
+            url, headers = metadata.location, {}
+        if start:
+            headers["Range"] = f"bytes={start}-"
+
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 206:
+                    return await response.read()
+                if response.status == 200:
+                    # Range ignored by the server, drop what we already have
+                    return (await response.read())[start:]
+                raise RuntimeError(f"Failed to fetch remote votes: HTTP {response.status}")
+
+    def _read_local_tail(self, size: int) -> bytes:
+        """Last `size` bytes of the local votes file (blocking)"""
+        with open(self.votes_file, "rb") as f:
+            f.seek(-size, os.SEEK_END)
+            return f.read(size)
+
+    def _read_votes_file(self) -> bytes:
+        """Whole local votes file, empty if there is none yet (blocking)"""
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        count = 0
-                        async for line in response.content:
-                            if line.strip():  # Skip empty lines
-                                count += 1
-                        return count
-                    else:
-                        logger.error(f"Failed to get remote votes: HTTP {response.status}")
-                        return 0
-        except Exception as e:
-            logger.error(f"Error counting remote votes: {str(e)}")
-            return 0
+            with open(self.votes_file, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return b""
+
+    def _write_votes_file(self, data: bytes, append: bool):
+        """Append to the local votes file, or replace it atomically (blocking)"""
+        if append:
+            with open(self.votes_file, "ab") as f:
+                f.write(data)
+            return
+        tmp_path = self.votes_file.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.votes_file)
 
     async def _sync_with_hub(self):
-        """Sync votes with HuggingFace hub using datasets"""
+        """Bring the local votes file up to date with the hub"""
+        async with self._sync_lock:
+            await self._fetch_new_votes()
+
+    async def _fetch_new_votes(self):
+        """Bring the local votes file up to date with the hub, holding the sync lock
+
+        The remote file is append-only, so only the bytes past the local size
+        are fetched. The Range request starts a little before them: if those
+        bytes no longer match the end of the local file, it is not a prefix of
+        the remote one anymore and the whole file is downloaded again.
+        """
         try:
             logger.info(LogFormatter.section("VOTE SYNC"))
-            self._log_repo_operation("sync", f"{HF_ORGANIZATION}/votes", "Syncing local votes with HF hub")
-            logger.info(LogFormatter.info("Syncing with HuggingFace hub..."))
-            
-            # Load votes from HF dataset
-            dataset = datasets.load_dataset(
-                f"{HF_ORGANIZATION}/votes", 
-                split="train",
-                cache_dir=cache_config.get_cache_path("datasets")
-            )
+            self._log_repo_operation("sync", VOTES_REPO, "Syncing local votes with HF hub")
             
-            remote_votes = len(dataset)
-            logger.info(LogFormatter.info(f"Dataset loaded with {remote_votes:,} votes"))
-            
-            # Convert to list of dictionaries
-            df = dataset.to_pandas()
-            if 'timestamp' in df.columns:
-                df['timestamp'] = df['timestamp'].dt.strftime('%Y-%m-%dT%H:%M:%SZ')
-            remote_votes = df.to_dict('records')
-            
-            # If we have more remote votes than local
-            if len(remote_votes) > self._total_votes:
-                new_votes = len(remote_votes) - self._total_votes
-                logger.info(LogFormatter.info(f"Processing {new_votes:,} new votes..."))
-                
-                # Save votes to local file
-                with open(self.votes_file, 'w') as f:
-                    for vote in remote_votes:
-                        f.write(json.dumps(vote) + '\n')
-                
-                # Reload votes in memory
-                await self._load_existing_votes()
-                logger.info(LogFormatter.success("Sync completed successfully"))
-            else:
+            try:
+                metadata = await self._remote_votes_metadata()
+            except EntryNotFoundError:
+                logger.info(LogFormatter.info(f"No votes on {VOTES_REPO} yet"))
+                self._remote_votes_revision = None
+                self._last_sync = datetime.now(timezone.utc)
+                return
+            if metadata.etag is not None and metadata.etag == self._remote_votes_etag:
                 logger.info(LogFormatter.success("Local votes are up to date"))
+                self._last_sync = datetime.now(timezone.utc)
+                return
+
+            local_size = self.votes_file.stat().st_size if self.votes_file.exists() else 0
+            remote_size = metadata.size
+            appended = None
+            if remote_size is None or remote_size >= local_size:
+                overlap = min(local_size, VOTES_OVERLAP_SIZE)
+                data = await self._fetch_remote_votes(metadata, local_size - overlap)
+                local_tail = await asyncio.to_thread(self._read_local_tail, overlap) if overlap else b""
+                if data[:overlap] == local_tail:
+                    appended = data[overlap:]
 
+            if appended is not None:
+                if appended:
+                    logger.info(LogFormatter.info(f"Appending {len(appended):,} new bytes of votes"))
+                    await asyncio.to_thread(self._write_votes_file, appended, True)
+                else:
+                    logger.info(LogFormatter.success("Local votes are up to date"))
+            else:
+                logger.warning(LogFormatter.warning("Local votes diverged from the hub, downloading all votes"))
+                data = await self._fetch_remote_votes(metadata)
+                await asyncio.to_thread(self._write_votes_file, data, False)
+
+            self._remote_votes_etag = metadata.etag
+            self._remote_votes_revision = metadata.commit_hash
             self._last_sync = datetime.now(timezone.utc)
+            await self._load_existing_votes()
+            logger.info(LogFormatter.success("Sync completed successfully"))
             
         except Exception as e:
             logger.error(LogFormatter.error("Sync failed", e))
             raise
 
-    async def _check_for_new_votes(self):
-        """Check for new votes on the hub"""
-        try:
-            self._log_repo_operation("check", f"{HF_ORGANIZATION}/votes", "Checking for new votes")
-            # Load only dataset metadata
-            dataset_info = datasets.load_dataset(f"{HF_ORGANIZATION}/votes", split="train")
-            remote_vote_count = len(dataset_info)
-            
-            if remote_vote_count > self._total_votes:
-                logger.info(f"Found {remote_vote_count - self._total_votes} new votes on hub")
-                await self._sync_with_hub()
-            else:
-                logger.info("No new votes found on hub")
-                
-        except Exception as e:
-            logger.error(f"Error checking for new votes: {str(e)}")
+    def _votes_file_rewritten(self, stat: os.stat_result) -> bool:
+        """Whether the votes file is no longer the one the loaded votes were read from"""
+        if self._votes_offset == 0:
+            return False
+        if stat.st_ino != self._votes_inode or stat.st_size < self._votes_offset:
+            return True
+        with open(self.votes_file, "rb") as f:
+            return hashlib.sha256(f.read(len(self._votes_header))).digest() != self._votes_header_hash
+
+    def _read_new_votes(self, offset: int, read_header: bool) -> Tuple[List[Dict[str, Any]], int, int, Optional[bytes]]:
+        """Parse the complete lines appended after `offset` (blocking)
+
+        Returns the votes, the offset after the last complete line, the
+        number of lines that could not be parsed and, if `read_header`, the
+        first bytes of the file up to that offset.
+        """
+        with open(self.votes_file, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+            # A line still being written is left for the next load
+            end = data.rfind(b"\n") + 1
+            header = None
+            if read_header:
+                f.seek(0)
+                header = f.read(min(offset + end, VOTES_HEADER_SIZE))
+        votes, invalid = [], 0
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                vote = json.loads(line)
+                timestamp = vote["timestamp"]
+                # Votes written by this service are already in the canonical format
+                if not (len(timestamp) == 20 and timestamp.endswith("Z")):
+                    vote["timestamp"] = datetime.fromisoformat(
+                        timestamp.replace("Z", "+00:00")
+                    ).astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+                votes.append(vote)
+            except (json.JSONDecodeError, KeyError, ValueError, AttributeError, TypeError) as e:
+                invalid += 1
+                logger.warning(LogFormatter.warning(f"Skipping invalid vote: {str(e)}"))
+        return votes, offset + end, invalid, header
+
+    def _reset_votes(self):
+        """Forget all loaded votes"""
+        self._store.clear()
+        self._votes_generation += 1
+        self._total_votes = 0
+        self._last_vote_timestamp = None
+        self._votes_offset = 0
+        self._votes_inode = None
+        self._votes_header = b""
+        self._votes_header_hash = None
 
     async def _load_existing_votes(self):
-        """Load existing votes from file"""
+        """Load the votes appended to the votes file since the last load
+
+        Only the new tail is parsed, into the existing indexes. Everything is
+        reloaded if the file was replaced or rewritten: different inode,
+        smaller than what was already read, or different first bytes. The
+        votes still queued for upload are added back after such a reload.
+        """
         if not self.votes_file.exists():
             logger.warning(LogFormatter.warning("No votes file found"))
             return
 
-        try:
-            logger.info(LogFormatter.section("LOADING VOTES"))
-            
-            # Clear existing data structures
-            self.vote_check_set.clear()
-            self._votes_by_model.clear()
-            self._votes_by_user.clear()
-            
-            vote_count = 0
-            latest_timestamp = None
-            
-            with open(self.votes_file, "r") as f:
-                for line in f:
-                    try:
-                        vote = json.loads(line.strip())
-                        vote_count += 1
-                        
-                        # Track latest timestamp
-                        try:
-                            vote_timestamp = datetime.fromisoformat(vote["timestamp"].replace("Z", "+00:00"))
-                            if not latest_timestamp or vote_timestamp > latest_timestamp:
-                                latest_timestamp = vote_timestamp
-                            vote["timestamp"] = vote_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
-                        except (KeyError, ValueError) as e:
-                            logger.warning(LogFormatter.warning(f"Invalid timestamp in vote: {str(e)}"))
-                            continue
-                        
-                        if vote_count % 1000 == 0:
-                            logger.info(LogFormatter.info(f"Processed {vote_count:,} votes..."))
-                        
-                        self._add_vote_to_memory(vote)
-                        
-                    except json.JSONDecodeError as e:
-                        logger.error(LogFormatter.error("Vote parsing failed", e))
-                        continue
-                    except Exception as e:
-                        logger.error(LogFormatter.error("Vote processing failed", e))
-                        continue
-            
-            self._total_votes = vote_count
-            self._last_vote_timestamp = latest_timestamp
-            
-            # Final summary
-            stats = {
-                "Total_Votes": vote_count,
-                "Latest_Vote": latest_timestamp.strftime("%Y-%m-%d %H:%M:%S UTC") if latest_timestamp else "None",
-                "Unique_Models": len(self._votes_by_model),
-                "Unique_Users": len(self._votes_by_user)
-            }
-            
-            logger.info(LogFormatter.section("VOTE SUMMARY"))
-            for line in LogFormatter.stats(stats):
-                logger.info(line)
-            
-        except Exception as e:
-            logger.error(LogFormatter.error("Failed to load votes", e))
-            raise
+        async with self._load_lock:
+            try:
+                stat = await asyncio.to_thread(os.stat, self.votes_file)
+                reset = await asyncio.to_thread(self._votes_file_rewritten, stat)
+                if reset:
+                    logger.info(LogFormatter.info("Votes file was rewritten, reloading all votes"))
+                    self._reset_votes()
+                elif stat.st_size == self._votes_offset:
+                    return
+
+                logger.info(LogFormatter.section("LOADING VOTES"))
+                full_load = self._votes_offset == 0
+                votes, offset, invalid, header = await asyncio.to_thread(
+                    self._read_new_votes, self._votes_offset, len(self._votes_header) < VOTES_HEADER_SIZE
+                )
+
+                latest_timestamp = self._last_vote_timestamp
+                added = 0
+                for vote in votes:
+                    added += self._add_vote_to_memory(vote)
+                    # Canonical timestamps compare correctly as strings
+                    if latest_timestamp is None or vote["timestamp"] > latest_timestamp:
+                        latest_timestamp = vote["timestamp"]
+
+                # Queued votes now in the hub's file were uploaded
+                uploaded = {_vote_key(vote) for vote in votes} & {_vote_key(vote) for vote in self.votes_to_upload}
+                if uploaded:
+                    self.votes_to_upload = [vote for vote in self.votes_to_upload if _vote_key(vote) not in uploaded]
+                if reset:
+                    # Votes cast here were forgotten with the rest, even if the file came back empty
+                    added += sum(self._add_vote_to_memory(vote) for vote in self.votes_to_upload)
+
+                self._total_votes += added
+                self._last_vote_timestamp = latest_timestamp
+                self._votes_offset = offset
+                self._votes_inode = stat.st_ino
+                if header is not None:
+                    self._votes_header = header
+                    self._votes_header_hash = hashlib.sha256(header).digest()
+
+                # Final summary
+                stats = {
+                    "Loaded_Votes": added,
+                    "Invalid_Lines": invalid,
+                    "Total_Votes": self._total_votes,
+                    "Latest_Vote": latest_timestamp or "None",
+                    "Unique_Models": len(self._store.models),
+                    "Unique_Users": len(self._store.users)
+                }
 
-    def _add_vote_to_memory(self, vote: Dict[str, Any]):
-        """Add vote to memory structures"""
+                logger.info(LogFormatter.section("VOTE SUMMARY" if full_load else "NEW VOTES"))
+                for line in LogFormatter.stats(stats):
+                    logger.info(line)
+
+            except Exception as e:
+                logger.error(LogFormatter.error("Failed to load votes", e))
+                raise
+
+    def _add_vote_to_memory(self, vote: Dict[str, Any]) -> bool:
+        """Add vote to memory structures, False if it was already there"""
         try:
-            check_tuple = (vote["model"], vote["revision"], vote["username"])
-            
-            # Skip if we already have this vote
-            if check_tuple in self.vote_check_set:
-                return
-                
-            self.vote_check_set.add(check_tuple)
-            
-            # Update model votes
-            if vote["model"] not in self._votes_by_model:
-                self._votes_by_model[vote["model"]] = []
-            self._votes_by_model[vote["model"]].append(vote)
-            
-            # Update user votes
-            if vote["username"] not in self._votes_by_user:
-                self._votes_by_user[vote["username"]] = []
-            self._votes_by_user[vote["username"]].append(vote)
-            
+            return self._store.add(vote)
         except KeyError as e:
             logger.error(f"Malformed vote data, missing key: {str(e)}")
         except Exception as e:
             logger.error(f"Error adding vote to memory: {str(e)}")
+        return False
+
+    def _append_outbox_line(self, line: str):
+        """Append to the outbox and wait for the disk (blocking)"""
+        with open(self.outbox_file, "a") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _queue_vote(self, vote: Dict[str, Any]):
+        """Record a new vote: on disk in the outbox first, then in memory and in the upload queue"""
+        async with self._outbox_lock:
+            # Checked under the lock so concurrent identical votes are recorded once
+            if self._store.has_vote(*_vote_key(vote)):
+                raise ValueError("Vote already recorded for this model")
+            await asyncio.to_thread(self._append_outbox_line, json.dumps(vote) + "\n")
+            if not self._add_vote_to_memory(vote):
+                # Not counted nor uploaded, the outbox line is dropped with the next rewrite
+                raise ValueError("Vote could not be recorded")
+            self._total_votes += 1
+            self.votes_to_upload.append(vote)
+
+    def _write_outbox(self, data: bytes):
+        """Replace the outbox atomically and wait for the disk (blocking)"""
+        tmp_path = self.outbox_file.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.outbox_file)
+
+    async def _rewrite_outbox(self):
+        """Replace the outbox with the votes still queued"""
+        async with self._outbox_lock:
+            data = "".join(json.dumps(vote) + "\n" for vote in self.votes_to_upload).encode()
+            await asyncio.to_thread(self._write_outbox, data)
+
+    def _claim_outboxes(self) -> List[Tuple[Path, Any, List[str]]]:
+        """Lock this process's outbox and take over those no running process holds (blocking)
+
+        Returns each claimed outbox of another process with its held lock and
+        its lines. Outboxes whose lock is held belong to running workers.
+        """
+        if self._outbox_lock_file is None:
+            lock_file = _lock_outbox_file(self.outbox_file)
+            if lock_file is None:
+                raise RuntimeError(f"Outbox {self.outbox_file} is locked by another process")
+            self._outbox_lock_file = lock_file
+        prefix = self.outbox_file.name.split(".")[0]
+        claimed = []
+        for path in sorted(self.outbox_file.parent.glob(f"{prefix}*.jsonl")):
+            if path == self.outbox_file:
+                continue
+            lock_file = _lock_outbox_file(path)
+            if lock_file is None:
+                continue
+            try:
+                with open(path, "r") as f:
+                    lines = [line for line in f if line.strip()]
+            except FileNotFoundError:
+                # Taken over by another worker meanwhile
+                path.with_suffix(".lock").unlink(missing_ok=True)
+                lock_file.close()
+                continue
+            claimed.append((path, lock_file, lines))
+        return claimed
 
-    async def get_user_votes(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get all votes from a specific user"""
+    def _read_outbox(self) -> List[str]:
+        """Lines of this process's outbox, left by an earlier process with the same pid (blocking)"""
+        if not self.outbox_file.exists():
+            return []
+        with open(self.outbox_file, "r") as f:
+            return [line for line in f if line.strip()]
+
+    def _remove_outbox(self, path: Path, lock_file):
+        """Delete a claimed outbox once its votes are in this process's outbox (blocking)"""
+        path.unlink(missing_ok=True)
+        path.with_suffix(".lock").unlink(missing_ok=True)
+        lock_file.close()
+
+    async def _load_outbox(self):
+        """Queue the votes left in outboxes by previous runs
+
+        This process's outbox is locked, and the outboxes of workers that are
+        no longer running are taken over: their votes are written to this
+        process's outbox before the old files are removed, so a crash in
+        between only leaves duplicates. Votes already in the synced votes
+        file were committed before the outbox could be cleared and are not
+        queued again.
+        """
+        claimed = await asyncio.to_thread(self._claim_outboxes)
+        lines = await asyncio.to_thread(self._read_outbox)
+        own_lines = len(lines)
+        for path, _, outbox_lines in claimed:
+            logger.info(LogFormatter.info(f"Taking over {len(outbox_lines):,} votes from {path.name}"))
+            lines.extend(outbox_lines)
+        queued = 0
+        for line in lines:
+            try:
+                vote = json.loads(line)
+            except json.JSONDecodeError as e:
+                # Last line of a crash mid-write, the vote was never acknowledged
+                logger.warning(LogFormatter.warning(f"Skipping invalid vote in outbox: {str(e)}"))
+                continue
+            if self._add_vote_to_memory(vote):
+                self._total_votes += 1
+                self.votes_to_upload.append(vote)
+                queued += 1
+        logger.info(LogFormatter.info(f"Queued {queued:,} votes from the outbox for upload"))
+        if claimed or queued != own_lines:
+            await self._rewrite_outbox()
+        for path, lock_file, _ in claimed:
+            await asyncio.to_thread(self._remove_outbox, path, lock_file)
+
+    async def _upload_votes(self):
+        """Commit the queued votes to the hub in a single commit
+
+        The local votes file is synced first, so the commit is the remote file
+        plus the queued votes, made on top of the synced commit: if someone
+        else committed meanwhile, the commit fails and is retried later.
+        """
+        async with self._upload_lock, self._sync_lock:
+            if not self.votes_to_upload:
+                return
+            await self._fetch_new_votes()
+            batch = list(self.votes_to_upload)
+            if not batch:
+                return
+
+            self._log_repo_operation("upload", VOTES_REPO, f"Committing {len(batch)} votes")
+            appended = "".join(json.dumps(vote) + "\n" for vote in batch).encode()
+            content = await asyncio.to_thread(self._read_votes_file) + appended
+            await asyncio.to_thread(
+                self.hf_api.create_commit,
+                repo_id=VOTES_REPO,
+                repo_type="dataset",
+                operations=[CommitOperationAdd(path_in_repo=VOTES_FILENAME, path_or_fileobj=content)],
+                commit_message=f"Add {len(batch)} votes",
+                parent_commit=self._remote_votes_revision,
+            )
+
+            # The local file mirrors the hub again; loading it dequeues the batch
+            await asyncio.to_thread(self._write_votes_file, appended, True)
+            self._remote_votes_etag = None
+            await self._load_existing_votes()
+            await self._rewrite_outbox()
+            logger.info(LogFormatter.success(f"Committed {len(batch)} votes to {VOTES_REPO}"))
+
+    def start_background_upload(self):
+        """Commit queued votes every flush interval, or as soon as a batch is full"""
+        if self._upload_task is None or self._upload_task.done():
+            self._upload_task = asyncio.create_task(self._upload_periodically())
+
+    async def stop_background_upload(self):
+        """Stop the uploader and commit what is still queued"""
+        if self._upload_task is not None and not self._upload_task.done():
+            self._upload_task.cancel()
+            try:
+                await self._upload_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._upload_task = None
+        if self.votes_to_upload:
+            try:
+                await self._upload_votes()
+            except Exception as e:
+                logger.error(LogFormatter.error(
+                    f"Failed to upload {len(self.votes_to_upload)} votes on shutdown, they stay in the outbox", e
+                ))
+
+    async def _upload_periodically(self):
+        while True:
+            delay = min(UPLOAD_FLUSH_INTERVAL * 2 ** self._upload_failures, UPLOAD_MAX_BACKOFF)
+            if self._upload_failures:
+                # Full batches do not cut the backoff short while the hub is failing
+                await asyncio.sleep(delay)
+            else:
+                try:
+                    await asyncio.wait_for(self._upload_requested.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+            self._upload_requested.clear()
+            if not self._initialized or not self.votes_to_upload:
+                continue
+            try:
+                await self._upload_votes()
+                self._upload_failures = 0
+            except Exception as e:
+                self._upload_failures += 1
+                logger.error(LogFormatter.error(
+                    f"Failed to upload {len(self.votes_to_upload)} votes (attempt {self._upload_failures})", e
+                ))
+
+    def _encode_cursor(self, offset: int) -> str:
+        """Opaque cursor pointing at a position in the vote lists as currently loaded"""
+        raw = json.dumps({"g": self._votes_generation, "o": offset}, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor: str) -> int:
+        """Resolve a cursor to an offset, rejecting cursors from before a reload"""
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded))
+            generation, offset = int(data["g"]), int(data["o"])
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if generation != self._votes_generation or offset < 0:
+            raise ValueError("Cursor refers to votes that were reloaded since, restart pagination")
+        return offset
+
+    def _page(
+        self, rows: Sequence[int], limit: int, cursor: Optional[str]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of a vote list, oldest first, and the cursor of the next one
+
+        Vote lists only grow at the end until a reload, so an offset stays
+        valid between pages. Only the votes of the page are materialized.
+        """
+        offset = self._decode_cursor(cursor) if cursor else 0
+        page = rows[offset:offset + limit]
+        stop = offset + len(page)
+        return self._store.votes(page), self._encode_cursor(stop) if stop < len(rows) else None
+
+    async def get_user_votes(
+        self, user_id: str, limit: int = DEFAULT_VOTES_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Vote totals of a user and one page of their votes"""
         logger.info(LogFormatter.info(f"Fetching votes for user: {user_id}"))
-        votes = self._votes_by_user.get(user_id, [])
-        logger.info(LogFormatter.success(f"Found {len(votes):,} votes"))
-        return votes
+        counts = self._store.user_counts(user_id)
+        votes, next_cursor = self._page(self._store.user_rows(user_id), limit, cursor)
+        logger.info(LogFormatter.success(f"Found {counts['total_votes']:,} votes"))
+        return {**counts, "votes": votes, "next_cursor": next_cursor}
 
-    async def get_model_votes(self, model_id: str) -> Dict[str, Any]:
-        """Get all votes for a specific model"""
+    async def get_model_votes(
+        self, model_id: str, limit: int = DEFAULT_VOTES_PAGE_SIZE, cursor: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Vote totals of a model, per revision and type, and one page of its votes"""
         logger.info(LogFormatter.info(f"Fetching votes for model: {model_id}"))
-        votes = self._votes_by_model.get(model_id, [])
-        
-        # Group votes by revision
-        votes_by_revision = {}
-        for vote in votes:
-            revision = vote["revision"]
-            if revision not in votes_by_revision:
-                votes_by_revision[revision] = 0
-            votes_by_revision[revision] += 1
+        counts = self._store.model_counts(model_id)
+        votes, next_cursor = self._page(self._store.model_rows(model_id), limit, cursor)
         
         stats = {
-            "Total_Votes": len(votes),
-            **{f"Revision_{k}": v for k, v in votes_by_revision.items()}
+            "Total_Votes": counts["total_votes"],
+            **{f"Revision_{k}": v for k, v in counts["votes_by_revision"].items()}
         }
         
         logger.info(LogFormatter.section("VOTE STATISTICS"))
@@ -315,11 +699,27 @@ class VoteService(HuggingFaceService):
             logger.info(line)
         
         return {
-            "total_votes": len(votes),
-            "votes_by_revision": votes_by_revision,
-            "votes": votes
+            **counts,
+            "votes": votes,
+            "next_cursor": next_cursor
         }
 
+    async def get_vote_counts(
+        self, model_ids: List[str], user_id: Optional[str] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """Vote totals of many models at once, and whether a user voted for each of them
+
+        Every model is a lookup in the running counters; models without votes
+        get zero counts.
+        """
+        voted = self._store.user_models(user_id) if user_id else None
+        counts = {}
+        for model_id in model_ids:
+            counts[model_id] = self._store.model_counts(model_id)
+            if voted is not None:
+                counts[model_id]["has_voted"] = model_id in voted
+        return counts
+
     async def _get_model_revision(self, model_id: str) -> str:
         """Get current revision of a model with retries"""
         logger.info(f"Getting revision for model: {model_id}")
@@ -351,10 +751,11 @@ class VoteService(HuggingFaceService):
             for line in LogFormatter.tree(stats, "Vote Details"):
                 logger.info(line)
             
+            if vote_type not in VOTE_TYPES:
+                raise ValueError(f"Invalid vote type: {vote_type}, expected one of {', '.join(VOTE_TYPES)}")
+
             revision = await self._get_model_revision(model_id)
-            check_tuple = (model_id, revision, user_id)
-            
-            if check_tuple in self.vote_check_set:
+            if self._store.has_vote(model_id, revision, user_id):
                 raise ValueError("Vote already recorded for this model")
 
             vote = {
@@ -365,12 +766,8 @@ class VoteService(HuggingFaceService):
                 "vote_type": vote_type
             }
 
-            # Update local storage
-            with open(self.votes_file, "a") as f:
-                f.write(json.dumps(vote) + "\n")
-            
-            self._add_vote_to_memory(vote)
-            self.votes_to_upload.append(vote)
+            # Durable before it is acknowledged, committed to the hub later
+            await self._queue_vote(vote)
             
             stats = {
                 "Status": "Success",
@@ -379,10 +776,10 @@ class VoteService(HuggingFaceService):
             for line in LogFormatter.stats(stats):
                 logger.info(line)
             
-            # Try to upload if batch size reached
+            # Upload now if batch size reached, without waiting for it
             if len(self.votes_to_upload) >= self._upload_batch_size:
-                logger.info(LogFormatter.info(f"Upload batch size reached ({self._upload_batch_size}), triggering sync"))
-                await self._sync_with_hub()
+                logger.info(LogFormatter.info(f"Upload batch size reached ({self._upload_batch_size}), triggering upload"))
+                self._upload_requested.set()
             
             return {"status": "success", "message": "Vote added successfully"}
             
@@ -0,0 +1,34 @@
+import pyarrow as pa
+from app.services.leaderboard_history import SnapshotStore
+from app.services.snapshot import FORMATTER_VERSION, LeaderboardSnapshot
+
+
+def test_formatted_columns_of_another_formatter_version_are_rebuilt(tmp_path):
+    table = pa.table({"fullname": ["org/a", "org/b"], "Precision": ["float16", "float16"], "Model sha": ["1", "2"]})
+    store = SnapshotStore(tmp_path)
+    store.save(LeaderboardSnapshot(table, version="v1"))
+
+    # Formatted columns left by older code, with outdated contents
+    current = tmp_path / f"v1.formatted.{FORMATTER_VERSION}.arrow"
+    stale = tmp_path / "v1.formatted.arrow"
+    current.rename(stale)
+    store._write_table(pa.table({"id": ["stale", "stale"]}), stale)
+
+    snapshot = store.open_snapshot("v1")
+
+    assert snapshot.formatted_column("model.name").to_pylist() == ["org/a", "org/b"]
+    assert current.exists() and not stale.exists()
+
+
+def test_followers_map_stored_payloads_and_row_hashes(tmp_path):
+    table = pa.table({"fullname": ["org/a", "org/b"], "Precision": ["float16", "float16"], "Model sha": ["1", "2"]})
+    built = LeaderboardSnapshot(table, version="v1")
+    SnapshotStore(tmp_path).save(built)
+
+    snapshot = SnapshotStore(tmp_path).open_snapshot("v1")
+
+    payload = snapshot.payload("formatted")
+    assert isinstance(payload.body, memoryview)
+    assert bytes(payload.body) == built.payload("formatted").body
+    assert ("rows", "hashes") in snapshot._indexes
+    assert snapshot.row_hashes().equals(built.row_hashes())
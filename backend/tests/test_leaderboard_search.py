@@ -0,0 +1,67 @@
+import re
+import pyarrow as pa
+import pytest
+from app.services.snapshot import LeaderboardSnapshot
+from app.services import leaderboard_search
+from app.services.leaderboard_search import TEXT_SEARCH_FIELD, field_index
+
+NAMES = [
+    "org/abc-model",
+    "org/Abcd",
+    "org/b-c-7b",
+    "org/x]bc",
+    "org/]bc-chat",
+    "org/xbc",
+    "org/41bc",
+    "org/0041bc",
+    "org/101bc",
+    "org/b2dc",
+    "other/llama-70b",
+]
+
+PATTERNS = [
+    r"\x41bc",
+    r"\u0041bc",
+    r"Abc",
+    r"\101bc",
+    r"b\x2dc",
+    r"[\]x]bc",
+    r"[x\]]bc",
+    r"abc?d",
+    r"llama.*70b",
+    r"(abc)-model",
+    r"abc|xbc",
+    r"\d+bc",
+]
+
+
+@pytest.fixture(scope="module")
+def index():
+    table = pa.table({
+        "fullname": NAMES,
+        "Precision": ["float16"] * len(NAMES),
+        "Model sha": [f"sha{i}" for i in range(len(NAMES))],
+    })
+    return field_index(LeaderboardSnapshot(table), TEXT_SEARCH_FIELD)
+
+
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_regex_matches_re_search(index, pattern):
+    expected = [bool(re.search(pattern, name, re.IGNORECASE)) for name in NAMES]
+    assert index.regex(pattern).tolist() == expected
+
+
+@pytest.mark.parametrize("pattern", [r"(.*)*z", r"(([a-z0-9./-])+)+z"])
+def test_catastrophic_regex_finishes(pattern):
+    names = ["meta-llama/llama-3.1-70b-instruct-finance-tuned-v2-" + "a" * 20, "org/fuzzy-model"]
+    table = pa.table({"fullname": names, "Precision": ["float16"] * 2, "Model sha": ["1", "2"]})
+    index = field_index(LeaderboardSnapshot(table), TEXT_SEARCH_FIELD)
+    assert index.regex(pattern).tolist() == [False, True]
+
+
+def test_regex_search_over_budget_is_rejected(monkeypatch):
+    table = pa.table({"fullname": ["org/" + "a1" * 28], "Precision": ["float16"], "Model sha": ["1"]})
+    index = field_index(LeaderboardSnapshot(table), TEXT_SEARCH_FIELD)
+    monkeypatch.setattr(leaderboard_search, "REGEX_SEARCH_TIMEOUT", 0.01)
+    with pytest.raises(ValueError):
+        index.regex(r"(((a|a1)+)+)+!")
@@ -0,0 +1,61 @@
+import json
+import pyarrow as pa
+from app.services.snapshot import LeaderboardSnapshot, rank_scores
+from app.services.leaderboard_changes import build_changes
+
+
+def make_table(averages):
+    return pa.table({
+        "fullname": [f"org/model-{i}" for i in range(len(averages))],
+        "Precision": ["float16"] * len(averages),
+        "Model sha": [f"sha{i}" for i in range(len(averages))],
+        "Average ⬆️": averages,
+    })
+
+
+def test_rank_scores_ties_for_best_are_at_100():
+    ranks, percentiles = rank_scores(pa.chunked_array([[90.0, 90.0, 50.0, None, 10.0]]))
+    assert ranks.to_pylist() == [1, 1, 2, None, 3]
+    assert percentiles.to_pylist() == [100.0, 100.0, 33.33, None, 0.0]
+
+
+def test_rank_scores_single_best_is_at_100():
+    _, percentiles = rank_scores(pa.chunked_array([[10.0, 90.0, 50.0]]))
+    assert percentiles.to_pylist() == [0.0, 100.0, 50.0]
+
+
+def test_adding_one_model_changes_no_other_row():
+    averages = [float(100 - i) for i in range(50)]
+    previous = LeaderboardSnapshot(make_table(averages), version="v1")
+    current = LeaderboardSnapshot(make_table(averages + [0.0]), version="v2")
+
+    changes = json.loads(build_changes(current, "v1", previous.row_hashes()).body)
+
+    assert [row["id"] for row in changes["added"]] == ["org/model-50_float16_sha50_False"]
+    assert changes["modified"] == []
+    assert changes["removed"] == []
+
+
+def test_unknown_versions_share_one_full_resync():
+    snapshot = LeaderboardSnapshot(make_table([1.0, 2.0]), version="v2")
+
+    first = build_changes(snapshot, "unknown-1", None)
+    second = build_changes(snapshot, "unknown-2", None)
+
+    assert first is second
+    changes = json.loads(first.body)
+    assert changes["full_resync"] and changes["since"] is None
+    assert len(changes["added"]) == 2
+
+
+def test_changes_list_modified_and_removed_rows_in_order():
+    previous = LeaderboardSnapshot(make_table([5.0, 4.0, 3.0, 2.0]), version="v1")
+    table = make_table([6.0, 1.0, 3.0, 0.5]).slice(0, 3)
+    table = pa.concat_tables([table, make_table([9.0] * 6).slice(5, 1)])
+    current = LeaderboardSnapshot(table, version="v2")
+
+    changes = json.loads(build_changes(current, "v1", previous.row_hashes()).body)
+
+    assert [row["id"] for row in changes["added"]] == ["org/model-5_float16_sha5_False"]
+    assert [row["id"] for row in changes["modified"]] == ["org/model-0_float16_sha0_False", "org/model-1_float16_sha1_False"]
+    assert changes["removed"] == ["org/model-3_float16_sha3_False"]
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import pytest
+from app.services.vote_store import VoteStore
+from app.services.votes import VoteService
+
+
+def make_vote(model, username):
+    return {
+        "model": model,
+        "revision": "main",
+        "username": username,
+        "timestamp": "2024-01-01T00:00:00Z",
+        "vote_type": "up",
+    }
+
+
+def make_service(tmp_path, worker=0):
+    # A fresh instance rather than the shared singleton
+    service = object.__new__(VoteService)
+    service.__init__()
+    service.votes_file = tmp_path / "votes_data.jsonl"
+    service.outbox_file = tmp_path / f"votes_outbox.{worker}.jsonl"
+    return service
+
+
+def outbox_models(service):
+    with open(service.outbox_file) as f:
+        return sorted(json.loads(line)["model"] for line in f)
+
+
+def replace_votes_file(path, votes):
+    # A new inode, as when the file is fetched again from the hub
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text("".join(json.dumps(vote) + "\n" for vote in votes))
+    os.replace(tmp_path, path)
+
+
+def test_queued_votes_survive_a_votes_file_reset(tmp_path):
+    async def scenario():
+        service = make_service(tmp_path)
+        replace_votes_file(service.votes_file, [make_vote("org/a", "alice"), make_vote("org/b", "bob")])
+        await service._load_existing_votes()
+        await service._queue_vote(make_vote("org/c", "carol"))
+
+        replace_votes_file(service.votes_file, [])
+        await service._load_existing_votes()
+
+        assert service._store.has_vote("org/c", "main", "carol")
+        assert not service._store.has_vote("org/a", "main", "alice")
+        assert [vote["model"] for vote in service.votes_to_upload] == ["org/c"]
+        assert service._total_votes == 1
+
+        replace_votes_file(service.votes_file, [make_vote("org/c", "carol")])
+        await service._load_existing_votes()
+
+        assert service.votes_to_upload == []
+        assert service._total_votes == 1
+
+    asyncio.run(scenario())
+
+
+def test_vote_store_keeps_rows_aligned_with_many_vote_types():
+    store = VoteStore()
+    for i in range(300):
+        assert store.add({**make_vote(f"org/m{i}", f"user{i}"), "vote_type": f"type{i}"})
+
+    assert len(store.model_ids) == len(store.vote_type_ids) == len(store) == 300
+    assert store.vote(299) == {**make_vote("org/m299", "user299"), "vote_type": "type299"}
+
+
+def test_malformed_vote_leaves_the_store_unchanged():
+    store = VoteStore()
+    with pytest.raises(TypeError):
+        store.add({**make_vote("org/a", "alice"), "vote_type": ["up"]})
+
+    assert len(store) == 0 and len(store.models) == 0 and len(store.users) == 0
+    assert store.add(make_vote("org/a", "alice"))
+    assert store.vote(0) == make_vote("org/a", "alice")
+
+
+def test_add_vote_rejects_unknown_vote_types(tmp_path):
+    async def scenario():
+        service = make_service(tmp_path)
+
+        async def revision(model_id):
+            return "main"
+
+        service._get_model_revision = revision
+        with pytest.raises(ValueError):
+            await service.add_vote("org/a", "alice", "sideways")
+        assert service.votes_to_upload == [] and not service.outbox_file.exists()
+
+        await service.add_vote("org/a", "alice", "up")
+        assert service._store.model_counts("org/a")["up_votes"] == 1
+        assert service._total_votes == 1
+
+    asyncio.run(scenario())
+
+
+def test_workers_keep_separate_outboxes_and_adopt_those_of_exited_workers(tmp_path):
+    async def scenario():
+        first, second = make_service(tmp_path, 1), make_service(tmp_path, 2)
+        for service, model in ((first, "org/a"), (second, "org/b")):
+            await service._load_outbox()
+            await service._queue_vote(make_vote(model, "alice"))
+        await second._rewrite_outbox()
+        assert outbox_models(first) == ["org/a"]
+
+        # The outbox of a running worker is left alone
+        third = make_service(tmp_path, 3)
+        await third._load_outbox()
+        assert third.votes_to_upload == []
+
+        first._outbox_lock_file.close()
+        fourth = make_service(tmp_path, 4)
+        await fourth._load_outbox()
+        assert [vote["model"] for vote in fourth.votes_to_upload] == ["org/a"]
+        assert outbox_models(fourth) == ["org/a"]
+        assert not first.outbox_file.exists()
+        assert outbox_models(second) == ["org/b"]
+
+    asyncio.run(scenario())
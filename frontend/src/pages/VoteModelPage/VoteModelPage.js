@@ -98,79 +98,45 @@ function VoteModelPage() {
     return `${diffInWeeks}w`;
   };
 
-  // Fetch user's votes
+  // Fetch pending models with their votes, and the user's votes, in one request
   useEffect(() => {
-    const fetchUserVotes = async () => {
-      if (!isAuthenticated || !user) return;
+    const fetchModels = async () => {
+      if (loading) return;
 
       try {
-        // Récupérer les votes du localStorage
-        const localVotes = JSON.parse(
-          localStorage.getItem(`votes_${user.username}`) || "[]"
-        );
-        const localVotesSet = new Set(localVotes);
-
-        // Récupérer les votes du serveur
-        const response = await fetch(`/api/votes/user/${user.username}`);
+        const params = new URLSearchParams({ votes: "true", sort: "votes" });
+        if (isAuthenticated && user) params.set("user_id", user.username);
+        const response = await fetch(`/api/models/pending?${params}`);
         if (!response.ok) {
-          throw new Error("Failed to fetch user votes");
+          throw new Error("Failed to fetch pending models");
         }
         const data = await response.json();
 
+        // Récupérer les votes du localStorage
+        const localVotes =
+          isAuthenticated && user
+            ? JSON.parse(
+                localStorage.getItem(`votes_${user.username}`) || "[]"
+              )
+            : [];
+
         // Fusionner les votes du serveur avec les votes locaux
         const votedModels = new Set([
-          ...data.map((vote) => vote.model),
-          ...localVotesSet,
+          ...data
+            .filter((model) => model.has_voted)
+            .map((model) => model.name),
+          ...localVotes,
         ]);
         setUserVotes(votedModels);
-      } catch (err) {
-        console.error("Error fetching user votes:", err);
-      }
-    };
-
-    fetchUserVotes();
-  }, [isAuthenticated, user]);
-
-  useEffect(() => {
-    const fetchModels = async () => {
-      try {
-        const response = await fetch("/api/models/pending");
-        if (!response.ok) {
-          throw new Error("Failed to fetch pending models");
-        }
-        const data = await response.json();
-
-        // Fetch votes for each model
-        const modelsWithVotes = await Promise.all(
-          data.map(async (model) => {
-            const [provider, modelName] = model.name.split("/");
-            const votesResponse = await fetch(
-              `/api/votes/model/${provider}/${modelName}`
-            );
-            const votesData = await votesResponse.json();
-
-            // Calculate total vote score from votes_by_revision
-            const totalScore = Object.values(
-              votesData.votes_by_revision || {}
-            ).reduce((a, b) => a + b, 0);
 
+        setPendingModels(
+          data.map((model) => ({
+            ...model,
             // Calculate wait time based on submission_time from model data
-            const waitTimeDisplay = formatWaitTime(model.submission_time);
-
-            return {
-              ...model,
-              votes: totalScore,
-              votes_by_revision: votesData.votes_by_revision,
-              wait_time: waitTimeDisplay,
-              hasVoted: userVotes.has(model.name),
-            };
-          })
+            wait_time: formatWaitTime(model.submission_time),
+            hasVoted: votedModels.has(model.name),
+          }))
         );
-
-        // Sort models by vote score in descending order
-        const sortedModels = modelsWithVotes.sort((a, b) => b.votes - a.votes);
-
-        setPendingModels(sortedModels);
       } catch (err) {
         setError(err.message);
       } finally {
@@ -179,6 +145,16 @@ function VoteModelPage() {
     };
 
     fetchModels();
+  }, [loading, isAuthenticated, user]);
+
+  // Keep the vote buttons in step with the user's votes
+  useEffect(() => {
+    setPendingModels((models) =>
+      models.map((model) => ({
+        ...model,
+        hasVoted: userVotes.has(model.name),
+      }))
+    );
   }, [userVotes]);
 
   const handleVote = async (modelName) => {